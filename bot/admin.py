@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from bot.models import TgUser
+from bot.models import GoalDueNotification, TgUser
 
 
 class TgUserAdmin(admin.ModelAdmin):
@@ -12,3 +12,13 @@ class TgUserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(TgUser, TgUserAdmin)
+
+
+class GoalDueNotificationAdmin(admin.ModelAdmin):
+    """Класс отображения отправленных напоминаний о сроках целей"""
+
+    list_display = ('tg_user', 'goal_id', 'due_date', 'created')
+    raw_id_fields = ('tg_user', 'goal')
+
+
+admin.site.register(GoalDueNotification, GoalDueNotificationAdmin)
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from bot.models import TgUser
+
+
+class TgUserCache:
+    """
+    Кэш пользователей бота по tg_id: LRU в памяти процесса поверх кэша Django (Redis).
+    В памяти держатся только привязанные пользователи (запись живет local_ttl секунд),
+    непривязанные всегда читаются из Redis: привязка аккаунта перезаписывает ключ в Redis,
+    и следующее сообщение бот обрабатывает уже от привязанного пользователя без запроса в БД
+    """
+
+    cache_key = 'bot:tg_user:{tg_id}'
+    timeout = 60 * 60 * 24
+    local_ttl = 60
+    max_size = 10_000
+
+    def __init__(self):
+        self.local: OrderedDict[str, tuple[float, TgUser]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, tg_id: str) -> TgUser | None:
+        tg_id = str(tg_id)
+        with self.lock:
+            if (entry := self.local.get(tg_id)) and entry[0] > time.monotonic():
+                self.local.move_to_end(tg_id)
+                return entry[1]
+
+        if (tg_user := cache.get(self._get_key(tg_id))) and tg_user.user_id:
+            self._set_local(tg_user)
+        return tg_user
+
+    def set(self, tg_user: TgUser):
+        cache.set(self._get_key(tg_user.tg_id), tg_user, self.timeout)
+        if tg_user.user_id:
+            self._set_local(tg_user)
+
+    def get_or_create(self, tg_id: str, username: str | None) -> TgUser:
+        if tg_user := self.get(tg_id):
+            return tg_user
+
+        tg_user, _ = TgUser.objects.get_or_create(tg_id=tg_id, defaults={'username': username})
+        self.set(tg_user)
+        return tg_user
+
+    def invalidate(self, tg_id: str):
+        with self.lock:
+            self.local.pop(str(tg_id), None)
+        cache.delete(self._get_key(tg_id))
+
+    def _set_local(self, tg_user: TgUser):
+        with self.lock:
+            self.local[str(tg_user.tg_id)] = (time.monotonic() + self.local_ttl, tg_user)
+            self.local.move_to_end(str(tg_user.tg_id))
+            while len(self.local) > self.max_size:
+                self.local.popitem(last=False)
+
+    def _get_key(self, tg_id: str) -> str:
+        return self.cache_key.format(tg_id=tg_id)
+
+
+tg_user_cache = TgUserCache()
@@ -0,0 +1,32 @@
+import logging
+from functools import cache
+
+from bot.tg.client import NotSentError, TgClient, TgError
+from core.jobs import JobError, job
+from todolist.settings import BOT_TOKEN
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def get_tg_client() -> TgClient:
+    return TgClient(BOT_TOKEN, raise_not_sent=True, raise_errors=True)
+
+
+@job(max_retries=5, retry_delay=5)
+def send_message(chat_id: str, text: str):
+    """Задача отправки сообщения пользователю бота"""
+
+    try:
+        res = get_tg_client().send_message(chat_id=chat_id, text=text)
+    except NotSentError as e:
+        raise JobError(f'Сообщение в чат {chat_id} не отправлено: {e}')
+    except TgError as e:
+        if e.error.error_code == 429 or e.error.error_code >= 500:
+            raise JobError(f'Telegram не принял сообщение в чат {chat_id}: {e}', retry_after=e.retry_after)
+        # Бот заблокирован, чат не найден и т.п.: повтор не поможет
+        logger.error(f'Telegram отклонил сообщение в чат {chat_id}: {e}')
+        return
+    if res is None:
+        # Telegram мог принять сообщение до ошибки: повтор задачи привел бы к дублю
+        logger.warning(f'Неизвестно, доставлено ли сообщение в чат {chat_id}')
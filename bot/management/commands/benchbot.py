@@ -0,0 +1,68 @@
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from bot.tg.fake_server import FakeBotApi, make_updates, read_updates
+
+
+class Command(BaseCommand):
+    help = 'Benchmark telegram-bot against a local fake Bot API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--updates', type=int, default=1000, help='Сколько синтетических обновлений отправить')
+        parser.add_argument('--chats', type=int, default=100, help='Между скольким числом чатов их распределить')
+        parser.add_argument('--text', action='append', dest='texts',
+                            help='Текст синтетических сообщений, можно указать несколько раз (по умолчанию /goals)')
+        parser.add_argument('--stream', help='Файл с записанными обновлениями, по одному JSON на строку')
+        parser.add_argument('--rate', type=float, default=100, help='Частота отправки обновлений в секунду')
+        parser.add_argument('--timeout', type=float, default=60, help='Сколько ждать ответов после отправки')
+        parser.add_argument('--port', type=int, default=0, help='Порт fake Bot API (по умолчанию любой свободный)')
+        parser.add_argument('--runbot-args', default='',
+                            help='Аргументы запускаемого runbot, например "--workers 4"')
+        parser.add_argument('--no-runbot', action='store_true',
+                            help='Не запускать runbot: бот (или webhook) подключается к fake Bot API сам')
+
+    def handle(self, *args, **options):
+        api = FakeBotApi(port=options['port']).start()
+        self.stdout.write(f'Fake Bot API: {api.url}')
+
+        runbot = None
+        if not options['no_runbot']:
+            runbot = subprocess.Popen(
+                [sys.executable, sys.argv[0], 'runbot', *shlex.split(options['runbot_args'])],
+                env={**os.environ, 'BOT_API_URL': api.url, 'BOT_TOKEN': os.environ.get('BOT_TOKEN') or 'bench'},
+            )
+        try:
+            if options['stream']:
+                updates = list(read_updates(options['stream']))
+            else:
+                updates = list(make_updates(options['updates'], options['chats'], options['texts'] or ['/goals']))
+
+            started = time.monotonic()
+            sent = api.replay(updates, rate=options['rate'])
+            api.wait_replies(sent, timeout=options['timeout'])
+            elapsed = (api.last_reply_at or time.monotonic()) - started
+        finally:
+            if runbot:
+                runbot.terminate()
+                runbot.wait()
+            api.stop()
+
+        self._report(sent, api.latencies, elapsed)
+
+    def _report(self, sent: int, latencies: list[float], elapsed: float):
+        self.stdout.write(f'Отправлено обновлений: {sent}, получен ответ: {len(latencies)}')
+        self.stdout.write(f'Пропускная способность: {len(latencies) / elapsed:.1f} обновлений/с за {elapsed:.1f} с')
+        if len(latencies) < 2:
+            return
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            'Задержка ответа, мс: '
+            f'p50 {percentiles[49] * 1000:.0f}, p95 {percentiles[94] * 1000:.0f}, '
+            f'p99 {percentiles[98] * 1000:.0f}, max {max(latencies) * 1000:.0f}'
+        )
@@ -0,0 +1,98 @@
+import datetime
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from bot.jobs import send_message
+from bot.models import GoalDueNotification
+from bot.tg.sender import MessageSender
+from goals.models import Goal
+
+
+class Command(BaseCommand):
+    help = 'Send telegram digests about goals that are due soon or overdue'
+
+    batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help='Напоминать о целях со сроком в ближайшие N дней')
+        parser.add_argument('--overdue-days', type=int, default=30,
+                            help='Не напоминать о целях, просроченных больше N дней назад')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        rows = self.get_due_goals(
+            date_from=today - datetime.timedelta(days=options['overdue_days']),
+            date_to=today + datetime.timedelta(days=options['days']),
+        )
+
+        users = goals = 0
+        batch: list[GoalDueNotification] = []
+        messages: list[tuple[str, str]] = []
+        for (tg_user_id, tg_id), user_goals in groupby(rows.iterator(chunk_size=self.batch_size),
+                                                       key=lambda row: (row['tg_user_id'], row['tg_id'])):
+            text, notified = self.get_digest(list(user_goals), today)
+            batch.extend(
+                GoalDueNotification(tg_user_id=tg_user_id, goal_id=row['id'], due_date=row['due_date'])
+                for row in notified
+            )
+            messages.append((tg_id, text))
+            users += 1
+            goals += len(notified)
+            if len(batch) >= self.batch_size:
+                self.save_notified(batch, messages)
+                batch, messages = [], []
+        self.save_notified(batch, messages)
+
+        self.stdout.write(f'Напоминаний: {users}, целей в них: {goals}')
+
+    def get_due_goals(self, date_from: datetime.date, date_to: datetime.date):
+        """
+        Один запрос по всем привязанным к боту пользователям: открытые цели со сроком
+        в окне (по частичному индексу goals_goal_open_due_idx) на досках пользователя,
+        о которых ему еще не напоминали с этим сроком. Строки упорядочены по пользователю
+        """
+
+        already_notified = GoalDueNotification.objects.filter(
+            tg_user_id=OuterRef('tg_user_id'), goal_id=OuterRef('pk'), due_date=OuterRef('due_date')
+        )
+        return Goal.objects.filter(
+            due_date__isnull=False,
+            due_date__gte=date_from,
+            due_date__lte=date_to,
+            category__is_deleted=False,
+            board__participants__user__tg_user__isnull=False,
+        ).exclude(
+            status__in=[Goal.Status.done, Goal.Status.archived],
+        ).annotate(
+            tg_user_id=F('board__participants__user__tg_user__id'),
+            tg_id=F('board__participants__user__tg_user__tg_id'),
+        ).filter(
+            ~Exists(already_notified),
+        ).order_by('tg_user_id', 'due_date', 'id').values('tg_user_id', 'tg_id', 'id', 'title', 'due_date')
+
+    def get_digest(self, goals: list[dict], today: datetime.date) -> tuple[str, list[dict]]:
+        """Текст напоминания и цели, которые в него поместились. Остальные попадут в следующий запуск"""
+
+        text = 'Сроки целей:'
+        notified = []
+        for goal in goals:
+            overdue = ' (просрочена)' if goal['due_date'] < today else ''
+            line = f'\n#{goal["id"]} {goal["title"]} - до {goal["due_date"]:%d.%m.%Y}{overdue}'
+            if len(text) + len(line) > MessageSender.max_message_length:
+                break
+            text += line
+            notified.append(goal)
+        return text, notified
+
+    @staticmethod
+    def save_notified(batch: list[GoalDueNotification], messages: list[tuple[str, str]]):
+        """Отметки и сообщения сохраняются вместе: сообщения уходят в очередь только после коммита отметок"""
+
+        with transaction.atomic():
+            GoalDueNotification.objects.bulk_create(batch, ignore_conflicts=True)
+            for tg_id, text in messages:
+                send_message.delay(chat_id=tg_id, text=text)
@@ -1,112 +1,304 @@
-import redis
+import asyncio
+import logging
+import time
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db.models import Q
 
+from bot.cache import tg_user_cache
 from bot.models import TgUser
+from bot.pool import WorkerPoolRunner
+from bot.runner import AsyncBotRunner
+from bot.state import get_dialog_state_store, get_update_log
 from bot.tg.client import TgClient
-from bot.tg.dc import GetUpdatesResponse, Message, MessageFrom
+from bot.tg.dc import CallbackQuery, GetUpdatesResponse, Message, MessageFrom, MessageInfo
+from bot.tg.sender import MessageSender
+from bot.updates import get_update_queue
 from goals.models import Goal, GoalCategory
 from todolist.settings import BOT_TOKEN
 
-
-redis_instance = redis.StrictRedis(host='redis')
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
     help = 'Run telegram-bot'
+    error_delay = 1
+    # Сколько раз обработчики пула и --async пробуют обновление, прежде чем оставить его до перезапуска
+    update_attempts = 3
+    # offset сохраняется раз в commit_every обновлений или commit_interval секунд,
+    # повторно полученные после перезапуска обновления отсеиваются по update_id
+    commit_every = 100
+    commit_interval = 5
+    goals_chunk_size = 200
 
     def __init__(self):
         super().__init__()
         self.tg_client = TgClient(BOT_TOKEN)
-        self.tg_user = TgUser
+        self.sender = MessageSender(self.tg_client)
+        self.update_queue = None
+        self.offset = 0
+        self.committed_offset = 0
+        self.committed_at = 0
+        self.update_log = get_update_log()
+        self.dialog_states = get_dialog_state_store()
         self.allow_commands_list = {
             '/goals': self._get_goals,
             '/create': self._create_category,
         }
         self.commands = {
-            b'/goals': self._get_goals,
-            b'/create': self._create_category,
-            b'set_name_category': self._set_name_category,
-            b'set_name_goal': self._set_name_goal,
+            'set_name_category': self._set_name_category,
+            'set_name_goal': self._set_name_goal,
+        }
+        self.callback_commands = {
+            'goals': self._turn_goals_page,
         }
 
     def _check_user_existence(self, user: MessageFrom, chat_id: str) -> TgUser:
-        """Проверка наличия пользователя"""
+        """Проверка наличия пользователя. Пользователи берутся из кэша, в БД только при промахе"""
 
-        tg_user, _ = self.tg_user.objects.get_or_create(tg_id=chat_id,
-                                                        username=user.id)
-        return tg_user
+        return tg_user_cache.get_or_create(tg_id=chat_id, username=user.id)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--async', action='store_true', dest='use_async',
+                            help='Обрабатывать сообщения разных чатов параллельно (asyncio)')
+        parser.add_argument('--concurrency', type=int, default=AsyncBotRunner.default_concurrency,
+                            help='Максимум одновременно обрабатываемых сообщений в режиме --async')
+        parser.add_argument('--from-queue', action='store_true', dest='from_queue',
+                            help='Брать обновления из очереди webhook (bot/webhook) вместо getUpdates')
+        parser.add_argument('--shard', type=int, default=0,
+                            help='Шард очереди webhook для --from-queue, у каждого шарда ровно один обработчик')
+        parser.add_argument('--workers', type=int,
+                            help='Обрабатывать сообщения в пуле из N процессов, чаты распределяются по chat.id')
 
     def handle(self, *args, **options):
         """Ручка на реакцию бота, когда начинается чат"""
 
-        offset = 0
+        if options['from_queue']:
+            self.update_queue = get_update_queue(options['shard'])
+        # Сообщения отправляет каждый процесс бота, общий лимит Telegram делится между ними
+        processes = (options['workers'] or 1) * (settings.BOT_UPDATE_SHARDS if options['from_queue'] else 1)
+        self.sender = MessageSender(self.tg_client, processes=processes)
+        self.offset = self.committed_offset = self.update_log.get_offset()
+        self.update_log.release_claims()
+        if options['workers']:
+            # Отправитель со своей долей общего лимита запускается в каждом воркере,
+            # в главном процессе только получение обновлений
+            WorkerPoolRunner(self, workers=options['workers']).run()
+            return
+
+        self.sender.start()
+        if options['use_async']:
+            asyncio.run(AsyncBotRunner(self, concurrency=options['concurrency']).run())
+            return
 
         while True:
-            res: GetUpdatesResponse = self.tg_client.get_updates(offset=offset)
-            if res:
-                for item in res.result:
-                    offset = item.update_id + 1
-                    chat_id = item.message.chat.id
-                    user = item.message.from_
-                    tg_user: TgUser = self._check_user_existence(user, chat_id)
-
-                    if not tg_user.user_id:
-                        self.tg_client.send_message(chat_id=chat_id, text=f'Привет {user.username or user.first_name}')
-                        verification_code = tg_user.generate_verification_code()
-                        self.tg_client.send_message(chat_id=chat_id, text=f'Подтвердите, пожалуйста, свой аккаунт. '
-                                                                          f'vomit.ga '
-                                                                          f'CODE: {verification_code} ')
-                    else:
-                        self._get_message_authorized_users(item.message, tg_user)
+            for item in self._fetch_updates():
+                self._process_update(item)
+                self._ack_update(item.update_id)
+
+    def _fetch_updates(self) -> list[MessageInfo]:
+        """Получение очередной пачки обновлений: из очереди webhook или через getUpdates"""
+
+        if self.update_queue:
+            return self.update_queue.pop_many()
+
+        self._commit_offset()
+        res: GetUpdatesResponse = self.tg_client.get_updates(offset=self.offset)
+        if not res:
+            time.sleep(self.error_delay)
+            return []
+        if res.result:
+            self.offset = res.result[-1].update_id + 1
+        return res.result
+
+    def _ack_update(self, update_id: int):
+        """Подтверждение обработки обновления из очереди webhook"""
+
+        if self.update_queue:
+            self.update_queue.ack(update_id)
+
+    def _complete_update(self, update_id: int):
+        """
+        Завершение обновления, розданного обработчикам (--workers, --async): подтверждение в очереди
+        webhook или удаление из обновлений в работе, сохраненных до подтверждения offset в Telegram
+        """
+
+        if self.update_queue:
+            self.update_queue.ack(update_id)
+        else:
+            self.update_log.remove_pending(update_id)
+
+    def _commit_offset(self):
+        """Сохранение offset: все обновления до него уже обработаны"""
+
+        now = time.monotonic()
+        if self.offset > self.committed_offset and (
+            self.offset - self.committed_offset >= self.commit_every or now - self.committed_at >= self.commit_interval
+        ):
+            self.update_log.commit_offset(self.offset)
+            self.committed_offset, self.committed_at = self.offset, now
+
+    def _process_update(self, item: MessageInfo):
+        """Обработка одного сообщения. Обновление отмечается обработанным только после успешной обработки"""
+
+        if not self.update_log.claim(item.update_id):
+            logger.info(f'Обновление {item.update_id} уже обработано или в работе')
+            return
+
+        try:
+            self._handle_update(item)
+        except Exception:
+            self.update_log.release(item.update_id)
+            raise
+        self.update_log.done(item.update_id)
+
+    def _process_update_with_retries(self, item: MessageInfo) -> bool:
+        """
+        Обработка розданного обновления (--workers, --async) с повторами после ошибок. False - все
+        попытки неудачны: обновление не завершается и остается в работе до перезапуска бота
+        """
+
+        for attempt in range(1, self.update_attempts + 1):
+            try:
+                self._process_update(item)
+                return True
+            except Exception:
+                logger.exception(f'Ошибка обработки сообщения {item.update_id}, попытка {attempt}')
+                if attempt < self.update_attempts:
+                    time.sleep(self.error_delay)
+        return False
+
+    def _handle_update(self, item: MessageInfo):
+        if item.callback_query:
+            self._process_callback_query(item.callback_query)
+            return
+        if not item.message:
+            return
+
+        chat_id = item.message.chat.id
+        user = item.message.from_
+        tg_user: TgUser = self._check_user_existence(user, chat_id)
+
+        if not tg_user.user_id:
+            self.sender.send_message(chat_id=chat_id, text=f'Привет {user.username or user.first_name}')
+            verification_code = tg_user.generate_verification_code()
+            self.sender.send_message(chat_id=chat_id, text=f'Подтвердите, пожалуйста, свой аккаунт. '
+                                                           f'vomit.ga '
+                                                           f'CODE: {verification_code} ')
+        else:
+            self._get_message_authorized_users(item.message, tg_user)
+
+    def _process_callback_query(self, callback_query: CallbackQuery):
+        """Обработка нажатия inline-кнопки"""
+
+        message = callback_query.message
+        if not message:
+            return
+        self.sender.answer_callback_query(chat_id=message.chat.id, callback_query_id=callback_query.id)
+        tg_user: TgUser = self._check_user_existence(callback_query.from_, message.chat.id)
+        if not tg_user.user_id or not callback_query.data:
+            return
+
+        command, _, payload = callback_query.data.partition(':')
+        if command in self.callback_commands:
+            self.callback_commands[command](message=message, tg_user=tg_user, payload=payload)
 
     def _get_message_authorized_users(self, message: Message, tg_user: TgUser):
         """Проверка на получение команды от авторизирован ого пользователя"""
 
-        user_state = redis_instance.get(tg_user.tg_id)
+        state = self.dialog_states.get(tg_user.tg_id)
         if message.text == '/cancel':
-            redis_instance.delete(tg_user.tg_id)
-            redis_instance.delete(f'{tg_user.tg_id}cat_name')
-            self.tg_client.send_message(chat_id=message.chat.id, text='Отмена')
+            self.dialog_states.clear(tg_user.tg_id)
+            self.sender.send_message(chat_id=message.chat.id, text='Отмена')
             return
-        if user_state in self.commands:
-            answer = self.commands[user_state](message=message, tg_user=tg_user)
-            self.tg_client.send_message(chat_id=message.chat.id, text=answer)
+        if state.get('step') in self.commands:
+            answer = self.commands[state['step']](message=message, tg_user=tg_user, state=state)
+            self.sender.send_message(chat_id=message.chat.id, text=answer)
             return
         if message.text in self.allow_commands_list:
-            redis_instance.set(tg_user.tg_id, message.text)
-            answer = self.allow_commands_list[message.text](message, tg_user)
-            self.tg_client.send_message(chat_id=message.chat.id, text=answer)
+            answer = self.allow_commands_list[message.text](message=message, tg_user=tg_user, state=state)
+            self.sender.send_message(chat_id=message.chat.id, text=answer)
+            return
+        self.sender.send_message(chat_id=message.chat.id, text='неизвестная команда')
+
+    def _get_goals(self, message: Message, tg_user: TgUser, state: dict):
+        """Команда на получение списка целей. Цели выводятся страницами с кнопками листания"""
+
+        text, reply_markup = self._get_goals_page(tg_user)
+        self.sender.send_message(chat_id=message.chat.id, text=text, reply_markup=reply_markup)
+
+    def _turn_goals_page(self, message: Message, tg_user: TgUser, payload: str):
+        """Кнопки листания списка целей: payload вида next:<id последней цели> или prev:<id первой цели>"""
+
+        direction, _, cursor = payload.partition(':')
+        if direction not in ('next', 'prev') or not cursor.isdigit():
             return
-        self.tg_client.send_message(chat_id=message.chat.id, text='неизвестная команда')
+        text, reply_markup = self._get_goals_page(tg_user, cursor=int(cursor), backward=direction == 'prev')
+        self.sender.edit_message(chat_id=message.chat.id, message_id=message.message_id,
+                                 text=text, reply_markup=reply_markup)
 
-    def _get_goals(self, message: Message, tg_user: TgUser) -> str:
-        """Команда на получение команды категорий"""
+    def _get_goals_page(self, tg_user: TgUser, cursor: int | None = None,
+                        backward: bool = False) -> tuple[str, dict | None]:
+        """
+        Страница списка целей по keyset-курсору (id цели). Читаются только id и title,
+        чтение останавливается, как только страница заполнила сообщение Telegram
+        """
 
-        user_goals: list[Goal] = Goal.objects.prefetch_related('category').filter(
-            Q(category__board__participants__user_id=tg_user.user_id) &
-            ~Q(status=Goal.Status.archived) &
+        goals = Goal.objects.filter(
+            Q(board__participants__user_id=tg_user.user_id) & ~Q(status=Goal.Status.archived) &
             Q(category__is_deleted=False)
         )
-        goals_list = '\n'.join(f'#{goal.id} {goal.title}' for goal in user_goals)
-        redis_instance.delete(tg_user.tg_id)
-        return goals_list if goals_list else 'Цели не найдены'
+        if cursor is not None:
+            goals = goals.filter(id__lt=cursor) if backward else goals.filter(id__gt=cursor)
+
+        lines: list[tuple[int, str]] = []
+        length = 0
+        has_more = False
+        for goal_id, title in goals.order_by('-id' if backward else 'id').values_list('id', 'title').iterator(
+            chunk_size=self.goals_chunk_size
+        ):
+            line = f'#{goal_id} {title}'
+            if length + len(line) + 1 > MessageSender.max_message_length:
+                has_more = True
+                break
+            lines.append((goal_id, line))
+            length += len(line) + 1
+
+        if not lines:
+            if backward:
+                return self._get_goals_page(tg_user)
+            return 'Цели не найдены', None
+
+        if backward:
+            lines.reverse()
+            has_prev, has_next = has_more, True
+        else:
+            has_prev, has_next = cursor is not None, has_more
+
+        buttons = []
+        if has_prev:
+            buttons.append({'text': '« Назад', 'callback_data': f'goals:prev:{lines[0][0]}'})
+        if has_next:
+            buttons.append({'text': 'Далее »', 'callback_data': f'goals:next:{lines[-1][0]}'})
+        reply_markup = {'inline_keyboard': [buttons]} if buttons else None
+        return '\n'.join(line for _, line in lines), reply_markup
 
-    def _create_category(self, message: Message, tg_user: TgUser):
+    def _create_category(self, message: Message, tg_user: TgUser, state: dict):
         """Команда создания категорий"""
 
-        self.tg_client.send_message(chat_id=message.chat.id,
-                                    text='Введите название категории для создания или /cancel для отмены'
-                                    )
+        self.sender.send_message(chat_id=message.chat.id,
+                                 text='Введите название категории для создания или /cancel для отмены'
+                                 )
         user_categories = GoalCategory.objects.prefetch_related('board__participants__user').filter(
             board__participants__user_id=tg_user.user_id,
             is_deleted=False
         )
         categories_list = '\n'.join(f'#{category.id} {category.title}' for category in user_categories)
-        self.tg_client.send_message(chat_id=message.chat.id, text=categories_list)
-        redis_instance.set(tg_user.tg_id, 'set_name_category')
+        self.sender.send_message(chat_id=message.chat.id, text=categories_list)
+        self.dialog_states.set(tg_user.tg_id, step='set_name_category')
 
-    def _set_name_category(self, message: Message, tg_user: TgUser):
+    def _set_name_category(self, message: Message, tg_user: TgUser, state: dict):
         """Получение списка категорий"""
 
         goal_category: list[GoalCategory] = GoalCategory.objects.prefetch_related('board__participants__user').filter(
@@ -115,23 +307,21 @@ class Command(BaseCommand):
             Q(title__iexact=message.text)
         )
         if goal_category:
-            redis_instance.append(f'{tg_user.tg_id}cat_name', goal_category[0].id)
-            redis_instance.set(tg_user.tg_id, 'set_name_goal')
-            self.tg_client.send_message(chat_id=message.chat.id,
-                                        text='Введите название цели для создания или /cancel для отмены')
+            self.dialog_states.set(tg_user.tg_id, step='set_name_goal', category_id=goal_category[0].id)
+            self.sender.send_message(chat_id=message.chat.id,
+                                     text='Введите название цели для создания или /cancel для отмены')
             return
-        self.tg_client.send_message(chat_id=message.chat.id, text='Не верное имя категории попробуйте еще раз')
+        self.sender.send_message(chat_id=message.chat.id, text='Не верное имя категории попробуйте еще раз')
 
-    def _set_name_goal(self, message: Message, tg_user: TgUser):
+    def _set_name_goal(self, message: Message, tg_user: TgUser, state: dict):
         """Получение списка целий"""
 
         obj = Goal.objects.create(user_id=tg_user.user_id,
                                   title=message.text,
-                                  category_id=int(redis_instance.get(f'{tg_user.tg_id}cat_name'))
+                                  category_id=int(state['category_id'])
                                   )
         if obj:
-            self.tg_client.send_message(chat_id=message.chat.id, text='Цель создана')
-            redis_instance.delete(tg_user.tg_id)
-            redis_instance.delete(f'{tg_user.tg_id}cat_name')
+            self.sender.send_message(chat_id=message.chat.id, text='Цель создана')
+            self.dialog_states.clear(tg_user.tg_id)
             return
-        self.tg_client.send_message(chat_id=message.chat.id, text='Что то не то')
+        self.sender.send_message(chat_id=message.chat.id, text='Что то не то')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bot.tg.client import TgClient
+from todolist.settings import BOT_TOKEN, BOT_WEBHOOK_SECRET
+
+
+class Command(BaseCommand):
+    help = 'Set or delete telegram-bot webhook'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', help='Адрес вью bot/webhook, например https://vomit.ga/bot/webhook')
+        parser.add_argument('--delete', action='store_true', help='Отключить webhook и вернуться к getUpdates')
+
+    def handle(self, *args, **options):
+        tg_client = TgClient(BOT_TOKEN)
+        if options['delete']:
+            res = tg_client.delete_webhook()
+        elif options['url']:
+            if not BOT_WEBHOOK_SECRET:
+                raise CommandError('Не задан BOT_WEBHOOK_SECRET')
+            res = tg_client.set_webhook(options['url'], secret_token=BOT_WEBHOOK_SECRET)
+        else:
+            raise CommandError('Укажите url или --delete')
+
+        if not res or not res.ok:
+            raise CommandError(f'Telegram не принял запрос: {res.description if res else "нет ответа"}')
+        self.stdout.write(self.style.SUCCESS(res.description or 'OK'))
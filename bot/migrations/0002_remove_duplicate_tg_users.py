@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    # Раньше get_or_create искал по паре (tg_id, username), поэтому на один чат могло появиться несколько записей.
+    # Перед добавлением уникальности tg_id оставляем одну запись на чат: привязанную к пользователю, иначе последнюю
+    TgUser = apps.get_model('bot', 'TgUser')
+
+    duplicated = (
+        TgUser.objects.values('tg_id').annotate(count=models.Count('id')).filter(count__gt=1).values_list('tg_id', flat=True)
+    )
+    for tg_id in duplicated:
+        keep = TgUser.objects.filter(tg_id=tg_id).annotate(
+            is_linked=models.ExpressionWrapper(models.Q(user__isnull=False), output_field=models.BooleanField())
+        ).order_by('-is_linked', '-id').first()
+        TgUser.objects.filter(tg_id=tg_id).exclude(id=keep.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
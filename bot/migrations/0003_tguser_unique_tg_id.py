@@ -0,0 +1,18 @@
+# Generated by Django 4.1.6 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0002_remove_duplicate_tg_users'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tguser',
+            name='tg_id',
+            field=models.CharField(max_length=150, unique=True, verbose_name='Tg id'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.1.6 on 2026-10-18 02:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0007_goal_open_due_index'),
+        ('bot', '0003_tguser_unique_tg_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoalDueNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField(verbose_name='Срок')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата отправки')),
+                ('goal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='goals.goal', verbose_name='Цель')),
+                ('tg_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bot.tguser', verbose_name='Телеграм пользователь')),
+            ],
+            options={
+                'verbose_name': 'Напоминание о сроке цели',
+                'verbose_name_plural': 'Напоминания о сроках целей',
+                'unique_together': {('tg_user', 'goal', 'due_date')},
+            },
+        ),
+    ]
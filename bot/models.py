@@ -9,7 +9,7 @@ from core.models import User
 class TgUser(models.Model):
     """Модели пользователя бота"""
 
-    tg_id = models.CharField(verbose_name=_('Tg id'), max_length=150)
+    tg_id = models.CharField(verbose_name=_('Tg id'), max_length=150, unique=True)
     username = models.CharField(verbose_name=_('Tg username'), max_length=150, null=True, blank=True)
     verification_code = models.CharField(verbose_name=_('Verification code'), max_length=255, null=True, blank=True)
     user = models.ForeignKey(
@@ -35,3 +35,17 @@ class TgUser(models.Model):
         self.verification_code = os.urandom(16).hex()
         self.save(update_fields=('verification_code',))
         return self.verification_code
+
+
+class GoalDueNotification(models.Model):
+    """Модель отправленных напоминаний о сроке цели. Повторно о той же цели с тем же сроком не напоминаем"""
+
+    tg_user = models.ForeignKey(TgUser, verbose_name=_('Телеграм пользователь'), on_delete=models.CASCADE)
+    goal = models.ForeignKey('goals.Goal', verbose_name=_('Цель'), on_delete=models.CASCADE, related_name='+')
+    due_date = models.DateField(verbose_name=_('Срок'))
+    created = models.DateTimeField(verbose_name=_('Дата отправки'), auto_now_add=True)
+
+    class Meta:
+        unique_together = ('tg_user', 'goal', 'due_date')
+        verbose_name = _('Напоминание о сроке цели')
+        verbose_name_plural = _('Напоминания о сроках целей')
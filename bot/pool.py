@@ -0,0 +1,137 @@
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+
+from django.db import close_old_connections, connections
+
+from bot.tg.dc import MessageInfo
+from bot.updates import get_update_shard
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPoolRunner:
+    """
+    Режим бота с пулом процессов. Главный процесс получает обновления и раздает их
+    N воркерам по chat.id, поэтому сообщения одного чата всегда обрабатывает один
+    процесс и строго по порядку. getUpdates запрашивается сразу после последнего
+    розданного обновления, и медленное обновление не останавливает получение следующих.
+    Такой offset подтверждает в Telegram и обновления в работе, поэтому до обработки они
+    хранятся в учете обновлений (UpdateLog.add_pending) и после перезапуска раздаются снова,
+    уже обработанные отсеиваются по update_id
+    """
+
+    default_workers = os.cpu_count() or 1
+    max_in_flight = 1000
+    wait_delay = 1
+
+    def __init__(self, command, workers: int = default_workers):
+        self.command = command
+        self.context = multiprocessing.get_context('fork')
+        self.tasks = [self.context.Queue() for _ in range(workers)]
+        self.results = self.context.Queue()
+        self.processes: list[multiprocessing.Process] = []
+        self.pending: set[int] = set()
+        self.next_update_id = command.offset
+        self.condition = threading.Condition()
+
+    def run(self):
+        # По SIGTERM (docker stop) воркеры дорабатывают взятые обновления и завершаются вместе с пулом
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        self._start_workers()
+        if not self.command.update_queue:
+            for item in self.command.update_log.get_pending():
+                self.dispatch(item)
+        threading.Thread(target=self._collect_results, name='bot-pool-results', daemon=True).start()
+        try:
+            while True:
+                self._wait_for_capacity()
+                items = self._fetch_new_updates()
+                if not items:
+                    self._wait_for_results()
+                for item in items:
+                    self.dispatch(item)
+        finally:
+            self.stop()
+
+    def _fetch_new_updates(self) -> list[MessageInfo]:
+        """Функция получает обновления, которые еще не были отправлены воркерам"""
+
+        if self.command.update_queue:
+            return self.command._fetch_updates()
+
+        # Обновления прошлой пачки сохранены в add_pending, и offset может их подтвердить
+        self.command.offset = self.next_update_id
+        items = [item for item in self.command._fetch_updates() if item.update_id >= self.next_update_id]
+        self.command.update_log.add_pending([item for item in items if item.chat_id])
+        return items
+
+    def dispatch(self, item: MessageInfo):
+        """Функция отправляет обновление воркеру, за которым закреплен чат"""
+
+        if not item.chat_id:
+            self.command._ack_update(item.update_id)
+        with self.condition:
+            self.next_update_id = max(self.next_update_id, item.update_id + 1)
+            if not item.chat_id:
+                return
+            self.pending.add(item.update_id)
+        self.tasks[self.get_shard(item.chat_id)].put(item)
+
+    def complete(self, update_id: int, processed: bool = True):
+        """Функция освобождает место в пуле. Необработанное обновление остается в работе до перезапуска"""
+
+        if processed:
+            self.command._complete_update(update_id)
+        with self.condition:
+            self.pending.discard(update_id)
+            self.condition.notify_all()
+
+    def get_shard(self, chat_id: str) -> int:
+        return get_update_shard(chat_id, len(self.tasks))
+
+    def stop(self):
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join()
+
+    def _start_workers(self):
+        # Соединения с БД не должны достаться дочерним процессам от родителя
+        connections.close_all()
+        for shard, tasks in enumerate(self.tasks):
+            process = self.context.Process(target=self._run_worker, args=(tasks,), name=f'bot-worker-{shard}',
+                                           daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def _run_worker(self, tasks: multiprocessing.Queue):
+        """Цикл воркера в дочернем процессе"""
+
+        self.command.sender.start()
+        while (item := tasks.get()) is not None:
+            close_old_connections()
+            processed = False
+            try:
+                processed = self.command._process_update_with_retries(item)
+            except Exception:
+                logger.exception(f'Ошибка обработки сообщения {item.update_id}')
+            finally:
+                self.results.put((item.update_id, processed))
+        self.command.sender.flush(timeout=self.wait_delay * 5)
+
+    def _collect_results(self):
+        while True:
+            self.complete(*self.results.get())
+
+    def _wait_for_capacity(self):
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.pending) < self.max_in_flight)
+
+    def _wait_for_results(self):
+        with self.condition:
+            if self.pending:
+                self.condition.wait(self.wait_delay)
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from bot.tg.dc import MessageInfo
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBotRunner:
+    """
+    Asyncio-движок бота. Сообщения разных чатов обрабатываются параллельно,
+    сообщения одного чата - строго по порядку (своя очередь и воркер на чат).
+    Обработчики команды runbot и запросы к Telegram выполняются в пуле потоков.
+    Следующий getUpdates подтверждает в Telegram обновления, которые еще в работе,
+    поэтому до обработки они хранятся в учете обновлений и после перезапуска раздаются снова.
+    Как и в пуле процессов, новые обновления не запрашиваются, пока в работе max_in_flight
+    обновлений, и медленные обработчики не копят очереди чатов в памяти
+    """
+
+    default_concurrency = 32
+    max_in_flight = 1000
+
+    def __init__(self, command, concurrency: int = default_concurrency):
+        self.command = command
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.chat_queues: dict[str, asyncio.Queue] = {}
+        self.workers: set[asyncio.Task] = set()
+        self.in_flight = 0
+        self.capacity = asyncio.Condition()
+
+    async def run(self):
+        if not self.command.update_queue:
+            for item in await asyncio.to_thread(self.command.update_log.get_pending):
+                self.dispatch(item)
+        while True:
+            async with self.capacity:
+                await self.capacity.wait_for(lambda: self.in_flight < self.max_in_flight)
+            for item in await asyncio.to_thread(self._fetch_updates):
+                self.dispatch(item)
+
+    def _fetch_updates(self) -> list[MessageInfo]:
+        items = self.command._fetch_updates()
+        if not self.command.update_queue:
+            self.command.update_log.add_pending([item for item in items if item.chat_id])
+        return items
+
+    def dispatch(self, item: MessageInfo):
+        """Функция кладет сообщение в очередь его чата и запускает воркер чата, если его нет"""
+
+        if not (chat_id := item.chat_id):
+            self.command._ack_update(item.update_id)
+            return
+        if (queue := self.chat_queues.get(chat_id)) is None:
+            queue = self.chat_queues[chat_id] = asyncio.Queue()
+            worker = asyncio.create_task(self._chat_worker(chat_id, queue))
+            self.workers.add(worker)
+            worker.add_done_callback(self.workers.discard)
+        queue.put_nowait(item)
+        self.in_flight += 1
+
+    async def _chat_worker(self, chat_id: str, queue: asyncio.Queue):
+        """Воркер чата обрабатывает сообщения по одному и завершается, когда очередь пуста"""
+
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                del self.chat_queues[chat_id]
+                return
+            async with self.semaphore:
+                try:
+                    await sync_to_async(self._process_update, thread_sensitive=False)(item)
+                except Exception:
+                    logger.exception(f'Ошибка обработки сообщения {item.update_id}')
+            async with self.capacity:
+                self.in_flight -= 1
+                self.capacity.notify_all()
+
+    def _process_update(self, item: MessageInfo):
+        """Обновление завершается только после успешной обработки, иначе остается в работе до перезапуска"""
+
+        close_old_connections()
+        if self.command._process_update_with_retries(item):
+            self.command._complete_update(item.update_id)
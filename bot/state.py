@@ -0,0 +1,269 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import redis
+
+from bot.tg.dc import MessageInfo
+from core.connections import get_backend
+
+
+class DialogStateStore(ABC):
+    """
+    Хранилище состояния диалога с ботом: словарь строк на чат с временем жизни.
+    Состояние читается и записывается целиком за одно обращение
+    """
+
+    ttl = 60 * 30
+
+    @abstractmethod
+    def get(self, chat_id: str) -> dict[str, str]:
+        ...
+
+    @abstractmethod
+    def set(self, chat_id: str, **state):
+        """Функция заменяет состояние чата и продлевает его время жизни"""
+
+    @abstractmethod
+    def clear(self, chat_id: str):
+        ...
+
+
+class RedisDialogStateStore(DialogStateStore):
+    """Состояние диалога в Redis: один hash на чат с TTL"""
+
+    key = 'bot:dialog:{chat_id}'
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    def get(self, chat_id: str) -> dict[str, str]:
+        return self.client.hgetall(self._get_key(chat_id))
+
+    def set(self, chat_id: str, **state):
+        key = self._get_key(chat_id)
+        pipeline = self.client.pipeline()
+        pipeline.delete(key)
+        pipeline.hset(key, mapping={field: str(value) for field, value in state.items()})
+        pipeline.expire(key, self.ttl)
+        pipeline.execute()
+
+    def clear(self, chat_id: str):
+        self.client.delete(self._get_key(chat_id))
+
+    def _get_key(self, chat_id: str) -> str:
+        return self.key.format(chat_id=chat_id)
+
+
+class MemoryDialogStateStore(DialogStateStore):
+    """Состояние диалога в памяти процесса, для запуска бота и тестов без Redis"""
+
+    def __init__(self):
+        self.states: dict[str, tuple[float, dict[str, str]]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, chat_id: str) -> dict[str, str]:
+        with self.lock:
+            expires, state = self.states.get(str(chat_id), (0, {}))
+            return dict(state) if expires > time.monotonic() else {}
+
+    def set(self, chat_id: str, **state):
+        with self.lock:
+            self.states[str(chat_id)] = (
+                time.monotonic() + self.ttl, {field: str(value) for field, value in state.items()}
+            )
+
+    def clear(self, chat_id: str):
+        with self.lock:
+            self.states.pop(str(chat_id), None)
+
+
+def get_dialog_state_store() -> DialogStateStore:
+    """Функция создает хранилище состояний, выбранное в настройке BOT_STATE_STORE"""
+
+    return get_backend('BOT_STATE_STORE', RedisDialogStateStore, MemoryDialogStateStore)
+
+
+class UpdateLog(ABC):
+    """
+    Учет обработанных обновлений Telegram: подтвержденный offset, переживающий
+    перезапуск бота, отметки update_id для отсева повторно доставленных обновлений
+    и обновления в работе, которые уже подтверждены в Telegram, но еще не обработаны.
+    Обновление берется в работу на claim_ttl секунд и отмечается обработанным на dedupe_ttl
+    только после успешной обработки, при ошибке отметка снимается
+    """
+
+    claim_ttl = 60 * 5
+    dedupe_ttl = 60 * 60 * 24
+
+    @abstractmethod
+    def get_offset(self) -> int:
+        ...
+
+    @abstractmethod
+    def commit_offset(self, offset: int):
+        ...
+
+    @abstractmethod
+    def claim(self, update_id: int) -> bool:
+        """Функция берет обновление в работу на claim_ttl. False - обновление обработано или уже в работе"""
+
+    @abstractmethod
+    def done(self, update_id: int):
+        """Функция отмечает обновление обработанным, повторно доставленное обновление будет пропущено"""
+
+    @abstractmethod
+    def release(self, update_id: int):
+        """Функция снимает отметку взятого в работу обновления, чтобы его можно было обработать снова"""
+
+    @abstractmethod
+    def release_claims(self):
+        """
+        Функция снимает отметки обновлений, взятых в работу до перезапуска бота. Каждое обновление
+        обрабатывает один процесс (чаты шардированы), поэтому при старте чужих живых отметок нет
+        """
+
+    @abstractmethod
+    def add_pending(self, updates: list[MessageInfo]):
+        """Функция сохраняет обновления в работе до того, как offset подтвердит их в Telegram"""
+
+    @abstractmethod
+    def remove_pending(self, update_id: int):
+        ...
+
+    @abstractmethod
+    def get_pending(self) -> list[MessageInfo]:
+        """Функция возвращает не обработанные до перезапуска обновления по порядку update_id"""
+
+
+class RedisUpdateLog(UpdateLog):
+    """
+    Учет обновлений в Redis: offset в строковом ключе, отметки - ключи с TTL (claimed или done),
+    update_id взятых в работу - set для снятия отметок при старте, обновления в работе - hash
+    """
+
+    offset_key = 'bot:offset'
+    update_key = 'bot:update:{update_id}'
+    claims_key = 'bot:claims'
+    pending_key = 'bot:pending'
+    claim_script = """
+        if redis.call('set', KEYS[1], 'claimed', 'NX', 'EX', ARGV[1]) then
+            redis.call('sadd', KEYS[2], ARGV[2])
+            return 1
+        end
+        return 0
+    """
+    release_claims_script = """
+        local update_ids = redis.call('smembers', KEYS[1])
+        for _, update_id in ipairs(update_ids) do
+            local key = ARGV[1] .. update_id
+            if redis.call('get', key) == 'claimed' then
+                redis.call('del', key)
+            end
+        end
+        redis.call('del', KEYS[1])
+        return #update_ids
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self.claim_in_redis = client.register_script(self.claim_script)
+        self.release_claims_in_redis = client.register_script(self.release_claims_script)
+
+    def get_offset(self) -> int:
+        return int(self.client.get(self.offset_key) or 0)
+
+    def commit_offset(self, offset: int):
+        self.client.set(self.offset_key, offset)
+
+    def claim(self, update_id: int) -> bool:
+        return bool(self.claim_in_redis(
+            keys=[self.update_key.format(update_id=update_id), self.claims_key], args=[self.claim_ttl, update_id]
+        ))
+
+    def done(self, update_id: int):
+        pipeline = self.client.pipeline()
+        pipeline.set(self.update_key.format(update_id=update_id), 'done', ex=self.dedupe_ttl)
+        pipeline.srem(self.claims_key, update_id)
+        pipeline.execute()
+
+    def release(self, update_id: int):
+        pipeline = self.client.pipeline()
+        pipeline.delete(self.update_key.format(update_id=update_id))
+        pipeline.srem(self.claims_key, update_id)
+        pipeline.execute()
+
+    def release_claims(self):
+        self.release_claims_in_redis(keys=[self.claims_key], args=[self.update_key.format(update_id='')])
+
+    def add_pending(self, updates: list[MessageInfo]):
+        if updates:
+            self.client.hset(self.pending_key, mapping={
+                update.update_id: update.json(by_alias=True) for update in updates
+            })
+
+    def remove_pending(self, update_id: int):
+        self.client.hdel(self.pending_key, update_id)
+
+    def get_pending(self) -> list[MessageInfo]:
+        updates = map(MessageInfo.parse_raw, self.client.hvals(self.pending_key))
+        return sorted(updates, key=lambda update: update.update_id)
+
+
+class MemoryUpdateLog(UpdateLog):
+    """Учет обновлений в памяти процесса, для запуска бота и тестов без Redis"""
+
+    def __init__(self):
+        self.offset = 0
+        self.claimed: dict[int, float] = {}
+        self.processed: dict[int, float] = {}
+        self.pending: dict[int, MessageInfo] = {}
+        self.lock = threading.Lock()
+
+    def get_offset(self) -> int:
+        return self.offset
+
+    def commit_offset(self, offset: int):
+        self.offset = offset
+
+    def claim(self, update_id: int) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            if self.processed.get(update_id, 0) > now or self.claimed.get(update_id, 0) > now:
+                return False
+            self.claimed[update_id] = now + self.claim_ttl
+            return True
+
+    def done(self, update_id: int):
+        now = time.monotonic()
+        with self.lock:
+            self.claimed.pop(update_id, None)
+            self.processed[update_id] = now + self.dedupe_ttl
+            if len(self.processed) > 100_000:
+                self.processed = {key: expires for key, expires in self.processed.items() if expires > now}
+
+    def release(self, update_id: int):
+        with self.lock:
+            self.claimed.pop(update_id, None)
+
+    def release_claims(self):
+        with self.lock:
+            self.claimed.clear()
+
+    def add_pending(self, updates: list[MessageInfo]):
+        with self.lock:
+            self.pending.update((update.update_id, update) for update in updates)
+
+    def remove_pending(self, update_id: int):
+        with self.lock:
+            self.pending.pop(update_id, None)
+
+    def get_pending(self) -> list[MessageInfo]:
+        with self.lock:
+            return [self.pending[update_id] for update_id in sorted(self.pending)]
+
+
+def get_update_log() -> UpdateLog:
+    """Функция создает учет обновлений, выбранный в настройке BOT_STATE_STORE"""
+
+    return get_backend('BOT_STATE_STORE', RedisUpdateLog, MemoryUpdateLog)
@@ -1,36 +1,185 @@
 import logging
+import random
+import time
+
 import requests
+from django.conf import settings
 from pydantic import ValidationError
-from bot.tg.dc import GetUpdatesResponse, SendMessageResponse
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from bot.tg.dc import ErrorResponse, GetUpdatesResponse, SendMessageResponse, WebhookResponse
 
 logger = logging.getLogger(__name__)
 
 
+class NotSentError(Exception):
+    """Запрос не выполнен после всех повторов, и Telegram его точно не принял"""
+
+
+class TgError(Exception):
+    """Telegram ответил на запрос ошибкой (ok=false)"""
+
+    def __init__(self, error: ErrorResponse):
+        super().__init__(f'{error.error_code}: {error.description}')
+        self.error = error
+
+    @property
+    def retry_after(self) -> int | None:
+        return self.error.parameters and self.error.parameters.retry_after
+
+
 class TgClient:
-    """Класс подключения и взаимодействия с ботом"""
+    """
+    Класс подключения и взаимодействия с ботом. Держит пул keep-alive соединений,
+    ставит таймауты и повторяет запросы с экспоненциальной задержкой и джиттером.
+    Идемпотентные методы повторяются при любых сетевых ошибках и 5xx, остальные
+    (sendMessage, editMessageText, ...) - только если запрос точно не дошел до Telegram:
+    при ошибке соединения и 429 (с учетом retry_after). Иначе таймаут чтения после
+    принятия сообщения привел бы к дублю. С raise_not_sent запрос, который точно
+    не дошел, поднимает NotSentError, чтобы вызывающий мог безопасно повторить его позже.
+    С raise_errors ответ с ошибкой на sendMessage и editMessageText поднимает TgError
+    """
+
+    connect_timeout = 5
+    read_timeout = 10
+    max_retries = 3
+    backoff = 0.5
+    max_backoff = 30
+    pool_size = 32
 
-    def __init__(self, token):
+    def __init__(self, token, api_url: str | None = None, raise_not_sent: bool = False, raise_errors: bool = False):
         self.token = token
+        self.raise_not_sent = raise_not_sent
+        self.raise_errors = raise_errors
+        self.api_url = (api_url or settings.BOT_API_URL).rstrip('/')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def get_url(self, method: str):
         """Функция подключения к боту через url с токеном"""
 
-        return f'https://api.telegram.org/bot{self.token}/{method}'
+        return f'{self.api_url}/bot{self.token}/{method}'
 
     def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
         """Функция получения обновлений из чата """
 
-        data = requests.get(self.get_url('getUpdates'), params={'timeout': timeout, 'offset': offset}).json()
+        data = self._request('getUpdates', {'timeout': timeout, 'offset': offset},
+                             read_timeout=timeout + self.read_timeout, idempotent=True)
         try:
             return GetUpdatesResponse(**data)
-        except ValidationError:
+        except (TypeError, ValidationError):
             logger.error(f'Пришли не валидные данные: {data}')
 
-    def send_message(self, chat_id: str, text: str) -> SendMessageResponse:
+    def send_message(self, chat_id: str, text: str, reply_markup: dict | None = None) -> SendMessageResponse:
         """Функция отправки сообщений в чат """
 
-        data = requests.get(self.get_url('sendMessage'), params={'chat_id': chat_id, 'text': text}).json()
+        params = {'chat_id': chat_id, 'text': text}
+        if reply_markup:
+            params['reply_markup'] = reply_markup
+        data = self._request('sendMessage', params)
+        self._raise_for_error(data)
         try:
             return SendMessageResponse(**data)
-        except ValidationError:
+        except (TypeError, ValidationError):
+            logger.error(f'Пришли не валидные данные: {data}')
+
+    def edit_message_text(self, chat_id: str, message_id: int, text: str,
+                          reply_markup: dict | None = None) -> SendMessageResponse:
+        """Функция замены текста и кнопок уже отправленного сообщения"""
+
+        params = {'chat_id': chat_id, 'message_id': message_id, 'text': text}
+        if reply_markup:
+            params['reply_markup'] = reply_markup
+        data = self._request('editMessageText', params)
+        self._raise_for_error(data)
+        try:
+            return SendMessageResponse(**data)
+        except (TypeError, ValidationError):
+            logger.error(f'Пришли не валидные данные: {data}')
+
+    def answer_callback_query(self, chat_id: str, callback_query_id: str) -> bool:
+        """Функция подтверждает нажатие inline-кнопки, чтобы у пользователя пропали часики"""
+
+        data = self._request('answerCallbackQuery', {'callback_query_id': callback_query_id})
+        return bool(data and data.get('ok'))
+
+    def set_webhook(self, url: str, secret_token: str | None = None) -> WebhookResponse:
+        """Функция включает доставку обновлений на webhook"""
+
+        params = {'url': url}
+        if secret_token:
+            params['secret_token'] = secret_token
+        data = self._request('setWebhook', params, idempotent=True)
+        try:
+            return WebhookResponse(**data)
+        except (TypeError, ValidationError):
             logger.error(f'Пришли не валидные данные: {data}')
+
+    def delete_webhook(self) -> WebhookResponse:
+        """Функция отключает webhook и возвращает бота к getUpdates"""
+
+        data = self._request('deleteWebhook', {}, idempotent=True)
+        try:
+            return WebhookResponse(**data)
+        except (TypeError, ValidationError):
+            logger.error(f'Пришли не валидные данные: {data}')
+
+    def _request(self, method: str, params: dict, read_timeout: float | None = None,
+                 idempotent: bool = False) -> dict | None:
+        """Функция запроса к Bot API с повторами. Возвращает разобранный JSON или None"""
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.get_url(method),
+                    json=params,
+                    timeout=(self.connect_timeout, read_timeout or self.read_timeout),
+                )
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f'Ошибка запроса {method} (попытка {attempt + 1}): {e}')
+                if not idempotent and not self._is_not_sent(e):
+                    return None
+            else:
+                if response.status_code < 500 and response.status_code != requests.codes.too_many_requests:
+                    return data
+                retry_after = (data.get('parameters') or {}).get('retry_after')
+                logger.warning(f'Telegram ответил {response.status_code} на {method}: {data.get("description")}')
+                if not idempotent and response.status_code != requests.codes.too_many_requests:
+                    # Запрос мог быть выполнен, повторять его или нет, решает вызывающий по ответу
+                    return data
+
+            if attempt < self.max_retries:
+                time.sleep(retry_after or self._get_backoff(attempt))
+        if self.raise_not_sent:
+            raise NotSentError(f'{method} не выполнен после {self.max_retries + 1} попыток')
+        return None
+
+    def _raise_for_error(self, data: dict | None):
+        """Функция поднимает TgError, если включен raise_errors и Telegram ответил ошибкой"""
+
+        if not self.raise_errors or not data or data.get('ok') is not False:
+            return
+        try:
+            error = ErrorResponse(**data)
+        except (TypeError, ValidationError):
+            logger.error(f'Пришли не валидные данные: {data}')
+            return
+        raise TgError(error)
+
+    @staticmethod
+    def _is_not_sent(error: Exception) -> bool:
+        """Функция проверяет, что запрос не был отправлен: соединение не установлено"""
+
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if isinstance(error, requests.ConnectionError) and error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def _get_backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
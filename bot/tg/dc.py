@@ -36,11 +36,34 @@ class Message(BaseModel):
         allow_population_by_field_name = True
 
 
+class CallbackQuery(BaseModel):
+    """Модель нажатия inline-кнопки"""
+
+    id: str
+    from_: MessageFrom = Field(..., alias='from')
+    message: Message | None
+    data: str | None
+
+    class Config:
+        allow_population_by_field_name = True
+
+
 class MessageInfo(BaseModel):
     """Модель бота полученных сообщений"""
 
     update_id: int
-    message: Message
+    message: Message | None
+    callback_query: CallbackQuery | None
+
+    @property
+    def chat_id(self) -> str | None:
+        """Чат обновления. None - для обновлений, которые бот не обрабатывает"""
+
+        if self.message:
+            return self.message.chat.id
+        if self.callback_query and self.callback_query.message:
+            return self.callback_query.message.chat.id
+        return None
 
 
 class GetUpdatesResponse(BaseModel):
@@ -55,3 +78,26 @@ class SendMessageResponse(BaseModel):
 
     ok: bool
     result: Message
+
+
+class WebhookResponse(BaseModel):
+    """Модель ответа на установку и удаление webhook"""
+
+    ok: bool
+    result: bool | None
+    description: str | None
+
+
+class ResponseParameters(BaseModel):
+    """Модель дополнительных параметров ошибки Bot API"""
+
+    retry_after: int | None
+
+
+class ErrorResponse(BaseModel):
+    """Модель ответа Bot API с ошибкой (ok=false)"""
+
+    ok: bool
+    error_code: int
+    description: str | None
+    parameters: ResponseParameters | None
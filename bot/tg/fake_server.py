@@ -0,0 +1,216 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count, cycle
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class FakeBotApi:
+    """
+    Локальная замена Bot API для разработки и замеров без api.telegram.org.
+    Отдает обновления через getUpdates или доставляет их на webhook, принимает
+    sendMessage/editMessageText/answerCallbackQuery и считает задержку ответа:
+    время от появления обновления до первого ответа бота в этот чат.
+    update_id начинаются с текущего времени в миллисекундах, поэтому они всегда больше
+    offset, сохраненного ботом в прошлых запусках
+    """
+
+    max_connections = 40
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), _FakeBotApiHandler)
+        self.server.api = self
+        self.condition = threading.Condition()
+        self.updates: deque[dict] = deque()
+        self.update_ids = count(int(time.time() * 1000))
+        self.message_ids = count(1)
+        self.waiting: defaultdict[str, deque[tuple[int, float]]] = defaultdict(deque)
+        self.delivered_id = 0
+        self.latencies: list[float] = []
+        self.last_reply_at: float | None = None
+        self.replies: list[dict] = []
+        self.webhook: dict | None = None
+        self.webhook_executor: ThreadPoolExecutor | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeBotApi':
+        threading.Thread(target=self.server.serve_forever, name='fake-bot-api', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.webhook_executor:
+            self.webhook_executor.shutdown(wait=False, cancel_futures=True)
+
+    def push(self, update: dict) -> dict:
+        """Функция делает обновление доступным боту. update_id выдается сервером"""
+
+        update = {**update, 'update_id': next(self.update_ids)}
+        with self.condition:
+            self.waiting[get_update_chat_id(update)].append((update['update_id'], time.monotonic()))
+            if self.webhook:
+                self.webhook_executor.submit(self._deliver, update, self.webhook)
+            else:
+                self.updates.append(update)
+                self.condition.notify_all()
+        return update
+
+    def replay(self, updates: Iterable[dict], rate: float) -> int:
+        """Функция выдает поток обновлений с заданной частотой (обновлений в секунду)"""
+
+        started = time.monotonic()
+        pushed = 0
+        for pushed, update in enumerate(updates, start=1):
+            if (delay := started + pushed / rate - time.monotonic()) > 0:
+                time.sleep(delay)
+            self.push(update)
+        return pushed
+
+    def wait_replies(self, expected: int, timeout: float) -> bool:
+        """Функция ждет, пока бот ответит на expected обновлений"""
+
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.latencies) >= expected, timeout)
+
+    def get_updates(self, offset: int = 0, timeout: float = 0, limit: int = 100) -> list[dict]:
+        with self.condition:
+            # Как в Telegram: offset подтверждает все обновления до него
+            while self.updates and self.updates[0]['update_id'] < offset:
+                self.updates.popleft()
+            self.condition.wait_for(lambda: self.updates, timeout)
+            updates = list(self.updates)[:limit]
+            if updates:
+                self.delivered_id = max(self.delivered_id, updates[-1]['update_id'])
+            return updates
+
+    def reply(self, chat_id: str, text: str, reply_markup: dict | None = None) -> dict:
+        """Функция запоминает ответ бота и закрывает полученные им обновления чата, ожидающие ответа"""
+
+        now = time.monotonic()
+        with self.condition:
+            waiting = self.waiting[str(chat_id)]
+            while waiting and waiting[0][0] <= self.delivered_id:
+                self.latencies.append(now - waiting.popleft()[1])
+            self.replies.append({'chat_id': str(chat_id), 'text': text, 'reply_markup': reply_markup})
+            self.last_reply_at = now
+            self.condition.notify_all()
+        return {
+            'message_id': next(self.message_ids),
+            'from': {'id': 1, 'is_bot': True, 'username': 'fake_bot'},
+            'chat': {'id': chat_id, 'first_name': 'Fake', 'type': 'private'},
+            'date': int(time.time()),
+            'text': text,
+        }
+
+    def set_webhook(self, url: str, secret_token: str | None = None):
+        with self.condition:
+            self.webhook = {'url': url, 'secret_token': secret_token} if url else None
+            if self.webhook and not self.webhook_executor:
+                self.webhook_executor = ThreadPoolExecutor(self.max_connections, thread_name_prefix='fake-webhook')
+            # Как в Telegram: накопленные обновления уходят на webhook
+            pending, self.updates = self.updates, deque()
+        for update in pending:
+            self.webhook_executor.submit(self._deliver, update, self.webhook)
+
+    def _deliver(self, update: dict, webhook: dict):
+        headers = {'X-Telegram-Bot-Api-Secret-Token': webhook['secret_token']} if webhook['secret_token'] else {}
+        for attempt in range(3):
+            try:
+                response = requests.post(webhook['url'], json=update, headers=headers, timeout=10)
+                if response.ok:
+                    with self.condition:
+                        self.delivered_id = max(self.delivered_id, update['update_id'])
+                    return
+                logger.warning(f'Webhook ответил {response.status_code} на {update["update_id"]}')
+            except requests.RequestException as e:
+                logger.warning(f'Ошибка доставки {update["update_id"]} на webhook: {e}')
+            time.sleep(2 ** attempt)
+
+
+class _FakeBotApiHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов вида /bot<token>/<method>"""
+
+    path_re = re.compile(r'^/bot[^/]+/(?P<method>\w+)$')
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        if not (path_match := self.path_re.match(self.path)):
+            return self._respond(404, {'ok': False, 'description': 'Not Found'})
+
+        length = int(self.headers.get('Content-Length') or 0)
+        params = json.loads(self.rfile.read(length) or b'{}')
+        api: FakeBotApi = self.server.api
+        match path_match['method']:
+            case 'getUpdates':
+                result = api.get_updates(int(params.get('offset', 0)), float(params.get('timeout', 0)),
+                                         int(params.get('limit', 100)))
+            case 'sendMessage' | 'editMessageText':
+                result = api.reply(params['chat_id'], params['text'], params.get('reply_markup'))
+            case 'answerCallbackQuery':
+                result = True
+            case 'setWebhook':
+                api.set_webhook(params.get('url'), params.get('secret_token'))
+                result = True
+            case 'deleteWebhook':
+                api.set_webhook(None)
+                result = True
+            case method:
+                return self._respond(404, {'ok': False, 'description': f'Method {method} is not supported'})
+        self._respond(200, {'ok': True, 'result': result})
+
+    def _respond(self, status: int, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_update_chat_id(update: dict) -> str:
+    message = update.get('message') or (update.get('callback_query') or {}).get('message') or {}
+    return str(message.get('chat', {}).get('id'))
+
+
+def make_updates(count: int, chats: int, texts: Iterable[str] = ('/goals',)) -> Iterator[dict]:
+    """Функция генерирует синтетический поток сообщений от chats пользователей"""
+
+    chat_ids = cycle(range(1, chats + 1))
+    texts = cycle(texts)
+    for message_id in range(1, count + 1):
+        chat_id = next(chat_ids)
+        yield {
+            'message': {
+                'message_id': message_id,
+                'from': {'id': chat_id, 'is_bot': False, 'username': f'bench{chat_id}'},
+                'chat': {'id': str(chat_id), 'first_name': 'Bench', 'type': 'private'},
+                'date': int(time.time()),
+                'text': next(texts),
+            },
+        }
+
+
+def read_updates(path: str) -> Iterator[dict]:
+    """Функция читает записанный поток обновлений: по одному JSON-объекту на строку"""
+
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+from bot.tg.client import TgClient
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше capacity накопленных"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def get_delay(self, now: float) -> float:
+        """Функция возвращает, сколько секунд ждать до появления токена"""
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+
+class MessageSender:
+    """
+    Очередь исходящих запросов бота (сообщения, правки сообщений, ответы на нажатия
+    кнопок). Запросы отправляет отдельный поток с ограничением частоты на чат и общим
+    ограничением бота. Идущие подряд простые сообщения одному чату склеиваются в одно,
+    пока укладываются в лимит Telegram.
+
+    Общий лимит Telegram действует на весь бот, поэтому при запуске в processes процессах
+    (runbot --workers, шарды --from-queue) каждый отправитель получает свою долю global_rate.
+    Чат всегда обслуживает один процесс, и лимит на чат не делится
+    """
+
+    max_message_length = 4096
+    separator = '\n\n'
+    global_rate = 30
+    chat_rate = 1
+    chat_burst = 3
+
+    def __init__(self, tg_client: TgClient, processes: int = 1):
+        self.tg_client = tg_client
+        self.queues: OrderedDict[str, deque[tuple[str, dict]]] = OrderedDict()
+        self.chat_buckets: dict[str, TokenBucket] = {}
+        rate = self.global_rate / processes
+        self.global_bucket = TokenBucket(rate, max(rate, 1))
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.worker = threading.Thread(target=self._run, name='tg-sender', daemon=True)
+
+    def start(self):
+        self.worker.start()
+
+    def send_message(self, chat_id: str, text: str | None, reply_markup: dict | None = None):
+        """Функция ставит сообщение в очередь и сразу возвращает управление"""
+
+        if not text:
+            return
+        self._put(chat_id, 'send_message', text=text, reply_markup=reply_markup)
+
+    def edit_message(self, chat_id: str, message_id: int, text: str, reply_markup: dict | None = None):
+        self._put(chat_id, 'edit_message_text', message_id=message_id, text=text, reply_markup=reply_markup)
+
+    def answer_callback_query(self, chat_id: str, callback_query_id: str):
+        self._put(chat_id, 'answer_callback_query', callback_query_id=callback_query_id)
+
+    def _put(self, chat_id: str, method: str, **params):
+        with self.condition:
+            self.queues.setdefault(str(chat_id), deque()).append((method, params))
+            self.condition.notify()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Функция ждет отправки всех сообщений из очереди"""
+
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.queues and not self.in_flight, timeout)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                chat_id, method, params = self._take_next()
+                self.in_flight += 1
+            try:
+                getattr(self.tg_client, method)(chat_id=chat_id, **params)
+            except Exception:
+                logger.exception(f'Ошибка запроса {method} в чат {chat_id}')
+            finally:
+                with self.condition:
+                    self.in_flight -= 1
+                    self.condition.notify_all()
+
+    def _take_next(self) -> tuple[str, str, dict]:
+        """Функция ждет чат, которому можно отправить запрос, и забирает его (простые сообщения склеенными)"""
+
+        while True:
+            if not self.queues:
+                self._prune_buckets()
+                self.condition.wait()
+                continue
+
+            now = time.monotonic()
+            delay = self.global_bucket.get_delay(now)
+            if not delay:
+                for chat_id in self.queues:
+                    bucket = self.chat_buckets.setdefault(chat_id, TokenBucket(self.chat_rate, self.chat_burst))
+                    chat_delay = bucket.get_delay(now)
+                    if not chat_delay:
+                        bucket.consume()
+                        self.global_bucket.consume()
+                        self.queues.move_to_end(chat_id)
+                        return chat_id, *self._pop_request(chat_id)
+                    delay = min(delay or chat_delay, chat_delay)
+            self.condition.wait(delay)
+
+    def _prune_buckets(self):
+        """Функция удаляет ограничители чатов, которые уже успели полностью восстановиться"""
+
+        idle = self.chat_burst / self.chat_rate
+        now = time.monotonic()
+        self.chat_buckets = {
+            chat_id: bucket for chat_id, bucket in self.chat_buckets.items() if now - bucket.updated < idle
+        }
+
+    def _pop_request(self, chat_id: str) -> tuple[str, dict]:
+        """Функция склеивает простые сообщения чата, пока они помещаются в одно сообщение Telegram"""
+
+        queue = self.queues[chat_id]
+        method, params = queue.popleft()
+        if self._is_plain_message(method, params):
+            text = params['text']
+            if len(text) > self.max_message_length:
+                queue.appendleft((method, {**params, 'text': text[self.max_message_length:]}))
+                text = text[:self.max_message_length]
+            while queue and self._is_plain_message(*queue[0]) and (
+                len(text) + len(self.separator) + len(queue[0][1]['text']) <= self.max_message_length
+            ):
+                text += self.separator + queue.popleft()[1]['text']
+            params = {'text': text}
+
+        if not queue:
+            del self.queues[chat_id]
+        return method, params
+
+    @staticmethod
+    def _is_plain_message(method: str, params: dict) -> bool:
+        return method == 'send_message' and not params.get('reply_markup')
@@ -0,0 +1,125 @@
+import queue
+import zlib
+from abc import ABC, abstractmethod
+
+import redis
+from django.conf import settings
+
+from bot.tg.dc import MessageInfo
+from core.connections import get_backend
+
+
+class UpdateQueue(ABC):
+    """
+    Очередь входящих обновлений Telegram между webhook и обработчиками бота.
+    Забранное обновление подтверждается через ack после обработки
+    """
+
+    @abstractmethod
+    def push(self, update: MessageInfo):
+        ...
+
+    @abstractmethod
+    def pop_many(self, limit: int = 100, timeout: int = 5) -> list[MessageInfo]:
+        """Функция ждет обновления до timeout секунд и забирает не больше limit штук"""
+
+    @abstractmethod
+    def ack(self, update_id: int):
+        """Функция подтверждает, что обновление обработано и не нужно выдавать его повторно"""
+
+
+def get_update_shard(chat_id: str, shards: int) -> int:
+    """Шард очереди обновлений чата. Чаты распределяются так же, как по воркерам в bot.pool"""
+
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+
+class RedisUpdateQueue(UpdateQueue):
+    """
+    Очередь обновлений на списках Redis, по списку на шард (crc32 от chat.id). Каждый шард
+    читает ровно один обработчик (runbot --from-queue --shard N), поэтому сообщения чата
+    обрабатываются по порядку. Забранные обновления через BLMOVE лежат в списке processing
+    шарда до ack, при старте обработчик возвращает неподтвержденные обновления в начало очереди
+    """
+
+    key = 'bot:updates:{shard}'
+    processing_key = 'bot:updates:{shard}:processing'
+
+    def __init__(self, client: redis.Redis, shard: int = 0):
+        self.client = client
+        self.shards = settings.BOT_UPDATE_SHARDS
+        if not 0 <= shard < self.shards:
+            raise ValueError(f'Шард {shard} вне диапазона 0..{self.shards - 1}')
+        self.shard = shard
+        self.in_flight: dict[int, str] = {}
+        self.recovered = False
+
+    def push(self, update: MessageInfo):
+        shard = get_update_shard(update.chat_id, self.shards)
+        self.client.lpush(self.key.format(shard=shard), update.json(by_alias=True))
+
+    def pop_many(self, limit: int = 100, timeout: int = 5) -> list[MessageInfo]:
+        key, processing_key = self.key.format(shard=self.shard), self.processing_key.format(shard=self.shard)
+        if not self.recovered:
+            self._requeue_unacked(key, processing_key)
+
+        if timeout:
+            raw = self.client.blmove(key, processing_key, timeout, src='RIGHT', dest='LEFT')
+        else:
+            raw = self.client.lmove(key, processing_key, src='RIGHT', dest='LEFT')
+        if not raw:
+            return []
+        pipeline = self.client.pipeline(transaction=False)
+        for _ in range(limit - 1):
+            pipeline.lmove(key, processing_key, src='RIGHT', dest='LEFT')
+        raw_updates = [raw, *filter(None, pipeline.execute())]
+
+        updates = []
+        for raw in raw_updates:
+            update = MessageInfo.parse_raw(raw)
+            self.in_flight[update.update_id] = raw
+            updates.append(update)
+        return updates
+
+    def ack(self, update_id: int):
+        if (raw := self.in_flight.pop(update_id, None)) is not None:
+            self.client.lrem(self.processing_key.format(shard=self.shard), 1, raw)
+
+    def _requeue_unacked(self, key: str, processing_key: str):
+        """Функция возвращает в начало очереди обновления, забранные до перезапуска и не подтвержденные"""
+
+        # Самое новое обновление лежит слева в processing, поэтому самое старое окажется первым в очереди
+        while self.client.lmove(processing_key, key, src='LEFT', dest='RIGHT'):
+            pass
+        self.recovered = True
+
+
+class MemoryUpdateQueue(UpdateQueue):
+    """Очередь обновлений в памяти процесса, для тестов и запуска без Redis. Теряется вместе с процессом"""
+
+    def __init__(self):
+        self.queue: queue.Queue[MessageInfo] = queue.Queue()
+
+    def push(self, update: MessageInfo):
+        self.queue.put(update)
+
+    def pop_many(self, limit: int = 100, timeout: int = 5) -> list[MessageInfo]:
+        try:
+            updates = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(updates) < limit and not self.queue.empty():
+            updates.append(self.queue.get_nowait())
+        return updates
+
+    def ack(self, update_id: int):
+        pass
+
+
+memory_update_queue = MemoryUpdateQueue()
+
+
+def get_update_queue(shard: int = 0) -> UpdateQueue:
+    """Функция возвращает очередь обновлений, выбранную в настройке BOT_UPDATE_QUEUE. shard - шард обработчика"""
+
+    return get_backend('BOT_UPDATE_QUEUE', lambda client: RedisUpdateQueue(client, shard), lambda: memory_update_queue)
@@ -1,8 +1,9 @@
 from django.urls import path
 
-from bot.views import VerificationCodeView
+from bot.views import TelegramWebhookView, VerificationCodeView
 
 
 urlpatterns = [
     path('verify', VerificationCodeView.as_view(), name='bot_verify'),
+    path('webhook', TelegramWebhookView.as_view(), name='bot_webhook'),
 ]
@@ -1,11 +1,23 @@
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from pydantic import ValidationError
+from rest_framework import status
 from rest_framework.exceptions import MethodNotAllowed
 from rest_framework.generics import UpdateAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from bot.cache import tg_user_cache
+from bot.jobs import send_message
 from bot.models import TgUser
 from bot.serializers import PatchVerificationSerializer
-from bot.tg.client import TgClient
-from todolist.settings import BOT_TOKEN
+from bot.tg.dc import MessageInfo
+from bot.updates import get_update_queue
+
+logger = logging.getLogger(__name__)
 
 
 class VerificationCodeView(UpdateAPIView):
@@ -23,10 +35,36 @@ class VerificationCodeView(UpdateAPIView):
 
     def perform_update(self, serializer):
         tg_user: TgUser = serializer.save()
-        TgClient(BOT_TOKEN).send_message(chat_id=tg_user.tg_id,
-                                         text='Аккаунт привязан успешно'
-                                         )
+        # Бот увидит привязку при следующем сообщении, не проверяя ее в БД
+        transaction.on_commit(lambda: tg_user_cache.set(tg_user))
+        send_message.delay(chat_id=tg_user.tg_id, text='Аккаунт привязан успешно')
         return super().perform_update(serializer)
 
     def put(self, request, *args, **kwargs):
         raise MethodNotAllowed(request.method)
+
+
+class TelegramWebhookView(APIView):
+    """
+    Вью приема обновлений от Telegram. Проверяет секрет из заголовка
+    X-Telegram-Bot-Api-Secret-Token, кладет обновление в очередь для воркеров
+    бота и сразу отвечает 200, не дожидаясь обработки
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        secret = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not settings.BOT_WEBHOOK_SECRET or not hmac.compare_digest(secret, settings.BOT_WEBHOOK_SECRET):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            update = MessageInfo(**request.data)
+        except (TypeError, ValidationError):
+            # На не 200 Telegram будет повторять доставку, поэтому неподдерживаемые обновления просто пропускаем
+            logger.warning(f'Пропущено неподдерживаемое обновление: {request.data}')
+            return Response()
+
+        if update.chat_id:
+            get_update_queue().push(update)
+        return Response()
@@ -0,0 +1,28 @@
+from functools import cache
+from typing import Callable, TypeVar
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+Backend = TypeVar('Backend')
+
+
+@cache
+def get_redis() -> redis.Redis:
+    """Общий на процесс клиент Redis для очередей и состояния бота (пул соединений создается один раз)"""
+
+    return redis.Redis.from_url(settings.QUEUE_REDIS_URL, decode_responses=True)
+
+
+def get_backend(setting: str, redis_backend: Callable[[redis.Redis], Backend],
+                memory_backend: Callable[[], Backend]) -> Backend:
+    """Функция создает реализацию в Redis или в памяти процесса по настройке со значением 'redis' или 'memory'"""
+
+    match getattr(settings, setting):
+        case 'redis':
+            return redis_backend(get_redis())
+        case 'memory':
+            return memory_backend()
+        case value:
+            raise ImproperlyConfigured(f'{setting} должен быть "redis" или "memory", а не {value!r}')
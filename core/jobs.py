@@ -0,0 +1,260 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+
+import redis
+from django.db import transaction
+
+from core.connections import get_backend
+
+logger = logging.getLogger(__name__)
+
+registry: dict[str, 'Job'] = {}
+
+
+class JobError(Exception):
+    """Ошибка задачи, после которой задачу нужно повторить позже, но не раньше retry_after секунд"""
+
+    def __init__(self, *args, retry_after: float | None = None):
+        super().__init__(*args)
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    Фоновая задача. Вызов delay() ставит задачу в очередь после коммита текущей
+    транзакции, выполняет ее команда runjobs. Упавшая задача повторяется с
+    экспоненциальной задержкой, после max_retries попыток уходит в список dead-letter
+    """
+
+    def __init__(self, func, max_retries: int = 5, retry_delay: float = 10):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Функция ставит задачу в очередь, когда транзакция будет закоммичена"""
+
+        payload = self._get_payload(args, kwargs)
+        transaction.on_commit(lambda: get_job_queue().push(payload))
+
+    def schedule(self, countdown: float, *args, **kwargs):
+        """Функция ставит задачу в очередь с запуском не раньше, чем через countdown секунд после коммита"""
+
+        payload = self._get_payload(args, kwargs)
+        transaction.on_commit(lambda: get_job_queue().schedule(payload, time.time() + countdown))
+
+    def get_retry_delay(self, attempt: int) -> float:
+        return self.retry_delay * 2 ** (attempt - 1)
+
+    def _get_payload(self, args: tuple, kwargs: dict) -> dict:
+        return {'id': uuid.uuid4().hex, 'name': self.name, 'args': args, 'kwargs': kwargs, 'attempt': 0}
+
+
+def job(func=None, *, max_retries: int = 5, retry_delay: float = 10):
+    """Декоратор регистрации фоновой задачи. Аргументы задачи должны сериализоваться в JSON"""
+
+    def decorator(func) -> Job:
+        registry[f'{func.__module__}.{func.__name__}'] = task = Job(func, max_retries, retry_delay)
+        return task
+
+    return decorator(func) if func else decorator
+
+
+class JobQueue(ABC):
+    """
+    Очередь задач: готовые к выполнению, отложенные до времени повтора и dead-letter.
+    Взятая задача подтверждается через ack после выполнения
+    """
+
+    dead_limit = 10_000
+
+    @abstractmethod
+    def push(self, payload: dict):
+        ...
+
+    @abstractmethod
+    def pop(self, timeout: int = 1) -> dict | None:
+        """Функция ждет задачу до timeout секунд, перед этим переносит в очередь отложенные задачи, чье время пришло"""
+
+    @abstractmethod
+    def schedule(self, payload: dict, run_at: float):
+        """Функция откладывает задачу до времени run_at (повторы и отложенный запуск)"""
+
+    @abstractmethod
+    def bury(self, payload: dict):
+        ...
+
+    @abstractmethod
+    def ack(self, payload: dict):
+        """Функция подтверждает, что взятая задача выполнена, отложена на повтор или отправлена в dead-letter"""
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Очередь задач в Redis: список задач, zset отложенных задач по времени запуска и список dead-letter.
+    Взятая задача через BLMOVE переходит в список processing и получает срок в zset leases. Если воркер
+    упал и не подтвердил задачу за visibility_timeout секунд, задача возвращается в начало очереди.
+    Задачи дольше visibility_timeout могут выполниться повторно
+    """
+
+    queue_key = 'jobs:queue'
+    delayed_key = 'jobs:delayed'
+    processing_key = 'jobs:processing'
+    leases_key = 'jobs:leases'
+    dead_key = 'jobs:dead'
+    visibility_timeout = 60 * 5
+    # Отложенные задачи, чье время пришло, переносятся в очередь. Задачам в processing без срока
+    # (воркер упал между BLMOVE и ZADD) срок назначается здесь, просроченные возвращаются в очередь
+    promote_script = """
+        local jobs = redis.call('zrangebyscore', KEYS[1], 0, ARGV[1], 'LIMIT', 0, 100)
+        for _, job in ipairs(jobs) do
+            redis.call('zrem', KEYS[1], job)
+            redis.call('lpush', KEYS[2], job)
+        end
+        for _, job in ipairs(redis.call('lrange', KEYS[3], 0, -1)) do
+            if not redis.call('zscore', KEYS[4], job) then
+                redis.call('zadd', KEYS[4], ARGV[1] + ARGV[2], job)
+            end
+        end
+        local expired = redis.call('zrangebyscore', KEYS[4], 0, ARGV[1], 'LIMIT', 0, 100)
+        for _, job in ipairs(expired) do
+            redis.call('zrem', KEYS[4], job)
+            redis.call('lrem', KEYS[3], 1, job)
+            redis.call('rpush', KEYS[2], job)
+        end
+        return #jobs + #expired
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self.promote = client.register_script(self.promote_script)
+        self.in_flight: dict[str, str] = {}
+
+    def push(self, payload: dict):
+        self.client.lpush(self.queue_key, json.dumps(payload))
+
+    def pop(self, timeout: int = 1) -> dict | None:
+        now = time.time()
+        self.promote(keys=[self.delayed_key, self.queue_key, self.processing_key, self.leases_key],
+                     args=[now, self.visibility_timeout])
+        if timeout:
+            item = self.client.blmove(self.queue_key, self.processing_key, timeout, src='RIGHT', dest='LEFT')
+        else:
+            item = self.client.lmove(self.queue_key, self.processing_key, src='RIGHT', dest='LEFT')
+        if not item:
+            return None
+
+        self.client.zadd(self.leases_key, {item: time.time() + self.visibility_timeout})
+        payload = json.loads(item)
+        self.in_flight[payload['id']] = item
+        return payload
+
+    def schedule(self, payload: dict, run_at: float):
+        self.client.zadd(self.delayed_key, {json.dumps(payload): run_at})
+
+    def bury(self, payload: dict):
+        pipeline = self.client.pipeline()
+        pipeline.lpush(self.dead_key, json.dumps(payload))
+        pipeline.ltrim(self.dead_key, 0, self.dead_limit - 1)
+        pipeline.execute()
+
+    def ack(self, payload: dict):
+        if (item := self.in_flight.pop(payload['id'], None)) is None:
+            return
+        pipeline = self.client.pipeline()
+        pipeline.lrem(self.processing_key, 1, item)
+        pipeline.zrem(self.leases_key, item)
+        pipeline.execute()
+
+
+class MemoryJobQueue(JobQueue):
+    """Очередь задач в памяти процесса, для тестов и запуска без Redis. Теряется вместе с процессом"""
+
+    def __init__(self):
+        self.queue: deque[dict] = deque()
+        self.delayed: list[tuple[float, dict]] = []
+        self.dead: deque[dict] = deque(maxlen=self.dead_limit)
+        self.condition = threading.Condition()
+
+    def push(self, payload: dict):
+        with self.condition:
+            self.queue.appendleft(json.loads(json.dumps(payload)))
+            self.condition.notify()
+
+    def pop(self, timeout: int = 1) -> dict | None:
+        with self.condition:
+            now = time.time()
+            self.queue.extendleft(payload for run_at, payload in self.delayed if run_at <= now)
+            self.delayed = [(run_at, payload) for run_at, payload in self.delayed if run_at > now]
+            if self.condition.wait_for(lambda: self.queue, timeout):
+                return self.queue.pop()
+            return None
+
+    def schedule(self, payload: dict, run_at: float):
+        with self.condition:
+            self.delayed.append((run_at, json.loads(json.dumps(payload))))
+
+    def bury(self, payload: dict):
+        with self.condition:
+            self.dead.appendleft(payload)
+
+    def ack(self, payload: dict):
+        pass
+
+
+memory_job_queue = MemoryJobQueue()
+
+
+def get_job_queue() -> JobQueue:
+    """Функция возвращает очередь задач, выбранную в настройке JOB_QUEUE"""
+
+    return get_backend('JOB_QUEUE', RedisJobQueue, lambda: memory_job_queue)
+
+
+def run_job(queue: JobQueue, payload: dict):
+    """
+    Функция выполняет задачу, при ошибке откладывает повтор или отправляет задачу в dead-letter.
+    Задача подтверждается в очереди в конце, поэтому после падения воркера она будет выполнена снова
+    """
+
+    _run_job(queue, payload)
+    queue.ack(payload)
+
+
+def _run_job(queue: JobQueue, payload: dict):
+    if not (task := registry.get(payload['name'])):
+        logger.error(f'Неизвестная задача {payload["name"]}')
+        queue.bury({**payload, 'error': 'unknown job'})
+        return
+
+    try:
+        task(*payload['args'], **payload['kwargs'])
+    except Exception as e:
+        attempt = payload['attempt'] + 1
+        if attempt > task.max_retries:
+            logger.exception(f'Задача {task.name} {payload["id"]} не выполнена после {attempt} попыток')
+            queue.bury({**payload, 'attempt': attempt, 'error': repr(e)})
+        else:
+            logger.warning(f'Задача {task.name} {payload["id"]} упала, повтор #{attempt}: {e!r}')
+            delay = max(task.get_retry_delay(attempt), getattr(e, 'retry_after', None) or 0)
+            queue.schedule({**payload, 'attempt': attempt}, time.time() + delay)
+
+
+def run_pending(queue: JobQueue | None = None) -> int:
+    """Функция выполняет все готовые задачи и возвращает их число"""
+
+    queue = queue or get_job_queue()
+    done = 0
+    while payload := queue.pop(timeout=0):
+        run_job(queue, payload)
+        done += 1
+    return done
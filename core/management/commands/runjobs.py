@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import get_job_queue, run_job, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true',
+                            help='Выполнить готовые задачи и завершиться, не дожидаясь новых')
+
+    def handle(self, *args, **options):
+        queue = get_job_queue()
+        if options['burst']:
+            self.stdout.write(f'Выполнено задач: {run_pending(queue)}')
+            return
+
+        while True:
+            if payload := queue.pop():
+                close_old_connections()
+                run_job(queue, payload)
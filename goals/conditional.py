@@ -0,0 +1,43 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+from django.db.models import Count, Max, QuerySet
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin(ABC):
+    """
+    Условный GET для вью. ETag считается дешевым запросом (max(updated) и число строк),
+    и если он совпал с If-None-Match, вью отвечает 304 без выборки и сериализации данных
+    """
+
+    @abstractmethod
+    def get_etag_parts(self) -> tuple:
+        """Значения, от которых зависит ответ. Права доступа здесь уже должны быть проверены"""
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag in {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        # Браузер всегда переспрашивает сервер, но при 304 берет ответ из своего кэша
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self, request) -> str:
+        parts = (request.user.id, request.get_full_path(), *self.get_etag_parts())
+        return quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
+
+    @staticmethod
+    def get_queryset_version(queryset: QuerySet) -> tuple:
+        """Версия выборки: время последнего изменения и число строк (удаление меняет число)"""
+
+        version = queryset.order_by().aggregate(last_updated=Max('updated'), count=Count('id'))
+        return version['last_updated'], version['count']
@@ -1,6 +1,11 @@
 import django_filters
-from django.db import models
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections, models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Concat
 from django_filters import rest_framework
+from rest_framework import filters
+from rest_framework.settings import api_settings
 
 from goals.models import Goal
 
@@ -20,3 +25,34 @@ class GoalDateFilter(rest_framework.FilterSet):
     filter_overrides = {
         models.DateTimeField: {'filter_class': django_filters.IsoDateTimeFilter},
     }
+
+
+class GoalFullTextSearchFilter(filters.SearchFilter):
+    """
+    Полнотекстовый поиск целей по search_vector (GIN индекс) с ранжированием.
+    Параметр 'highlight' добавляет подсвеченный фрагмент текста.
+    На других БД (SQLite в тестах) работает как обычный SearchFilter
+    """
+
+    search_config = 'russian'
+    highlight_param = 'highlight'
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        query = SearchQuery(' '.join(search_terms), config=self.search_config, search_type='websearch')
+        queryset = queryset.filter(search_vector=query).annotate(search_rank=SearchRank(F('search_vector'), query))
+        if request.query_params.get(self.highlight_param):
+            queryset = queryset.annotate(search_headline=SearchHeadline(
+                Concat('title', Value(' '), Coalesce('description', Value(''))),
+                query,
+                config=self.search_config,
+            ))
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', 'id')
+        return queryset
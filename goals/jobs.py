@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from bot.jobs import send_message
+from bot.tg.sender import MessageSender
+from core.jobs import job
+from goals.models import BoardParticipant, GoalComment
+
+# Комментарии к цели копятся COMMENT_NOTIFY_DELAY секунд и уходят участникам доски одним сообщением
+COMMENT_NOTIFY_DELAY = 30
+PENDING_KEY = 'goals:comment_notify:pending:{goal_id}'
+NOTIFIED_KEY = 'goals:comment_notify:notified:{goal_id}'
+
+
+def notify_goal_comment(comment: GoalComment):
+    """
+    Функция ставит уведомление о новом комментарии после коммита. Если по цели уже
+    ждет уведомление, новый комментарий попадет в него, отдельная задача не ставится
+    """
+
+    def enqueue():
+        # Ключ живет дольше задержки, чтобы уведомления не остановились, если задача потерялась
+        if cache.add(PENDING_KEY.format(goal_id=comment.goal_id), comment.id, COMMENT_NOTIFY_DELAY * 10):
+            notify_goal_comments.schedule(COMMENT_NOTIFY_DELAY, comment.goal_id, comment.id)
+
+    transaction.on_commit(enqueue)
+
+
+@job(max_retries=3)
+def notify_goal_comments(goal_id: int, first_comment_id: int):
+    """Задача рассылает новые комментарии цели участникам доски, привязанным к боту"""
+
+    # Комментарии, пришедшие после этой строки, откроют новое окно и новую задачу
+    cache.delete(PENDING_KEY.format(goal_id=goal_id))
+    notified_id = max(first_comment_id - 1, cache.get(NOTIFIED_KEY.format(goal_id=goal_id), 0))
+    comments = list(
+        GoalComment.objects.filter(goal_id=goal_id, id__gt=notified_id).order_by('id').values(
+            'id', 'user_id', 'user__username', 'text', 'goal__title'
+        )
+    )
+    if not comments:
+        return
+    cache.set(NOTIFIED_KEY.format(goal_id=goal_id), comments[-1]['id'], 60 * 60 * 24)
+
+    recipients = BoardParticipant.objects.filter(
+        board__goals=goal_id,
+        user__tg_user__isnull=False,
+    ).values_list('user_id', 'user__tg_user__tg_id')
+    for user_id, tg_id in recipients:
+        # Автору о собственных комментариях не сообщаем
+        if text := get_comments_text(goal_id, [comment for comment in comments if comment['user_id'] != user_id]):
+            send_message.delay(chat_id=tg_id, text=text)
+
+
+def get_comments_text(goal_id: int, comments: list[dict]) -> str | None:
+    if not comments:
+        return None
+
+    text = f'Новые комментарии к цели #{goal_id} {comments[0]["goal__title"]}:'
+    for comment in comments:
+        line = f'\n{comment["user__username"]}: {comment["text"]}'
+        if len(text) + len(line) > MessageSender.max_message_length:
+            return (text + line)[:MessageSender.max_message_length - 1] + '…'
+        text += line
+    return text
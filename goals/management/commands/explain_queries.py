@@ -0,0 +1,91 @@
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import User
+from goals.models import Board, BoardParticipant, Goal, GoalCategory
+from goals.views import GoalCategoryListView, GoalListView
+
+
+class Command(BaseCommand):
+    help = 'Показывает EXPLAIN горячих запросов целей и досок и проверяет, что используются индексы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Количество целей для временного тестового набора данных (откатывается после проверки)')
+        parser.add_argument('--user', type=int, help='id пользователя, для которого строятся запросы')
+        parser.add_argument('--strict', action='store_true', help='Завершиться с ошибкой, если индекс не используется')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user_id = self._seed(options['seed']) if options['seed'] else options['user']
+            if user_id is None:
+                user_id = BoardParticipant.objects.values_list('user_id', flat=True).first()
+            if user_id is None:
+                raise CommandError('Нет данных: укажите --seed или --user')
+
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE goals_boardparticipant, goals_goalcategory, goals_goal')
+
+            missing = [name for name, queryset, index in self._get_queries(user_id) if not self._explain(name, queryset, index)]
+            transaction.set_rollback(True)
+
+        if missing and options['strict']:
+            raise CommandError(f'Индекс не используется: {", ".join(missing)}')
+
+    @staticmethod
+    def _get_queries(user_id: int) -> list[tuple]:
+        """Запросы из вьюх списков и проверки прав (goals.roles)"""
+
+        view_request = SimpleNamespace(user=SimpleNamespace(id=user_id))
+        goal_list = GoalListView(request=view_request).get_queryset().order_by('title')
+        category_list = GoalCategoryListView(request=view_request).get_queryset().order_by('title')
+        board_roles = BoardParticipant.objects.filter(user_id=user_id).values_list('board_id', 'role')
+        return [
+            ('goal list', goal_list, 'goals_goal_active_board_idx'),
+            ('category list', category_list, 'goals_cat_active_board_idx'),
+            ('board roles', board_roles, 'goals_bp_user_board_role_idx'),
+        ]
+
+    def _explain(self, name: str, queryset, index: str) -> bool:
+        plan = queryset.explain()
+        is_used = index in plan
+        style = self.style.SUCCESS if is_used else self.style.WARNING
+        self.stdout.write(style(f'{name}: индекс {index} {"используется" if is_used else "НЕ используется"}'))
+        self.stdout.write(plan + '\n')
+        return is_used
+
+    @staticmethod
+    def _seed(goals_count: int, users_count: int = 100, categories_per_board: int = 5) -> int:
+        """Создание тестового набора данных. Возвращает id пользователя для проверки"""
+
+        prefix = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(User(username=f'explain_{prefix}_{i}') for i in range(users_count))
+        boards = Board.objects.bulk_create(Board(title=f'Board {i}') for i in range(users_count))
+        BoardParticipant.objects.bulk_create(
+            BoardParticipant(board=board, user=user, role=BoardParticipant.Role.owner)
+            for board, user in zip(boards, users)
+        )
+        categories = GoalCategory.objects.bulk_create(
+            GoalCategory(board=board, user=user, title=f'Category {i}', is_deleted=i == 0)
+            for board, user in zip(boards, users)
+            for i in range(categories_per_board)
+        )
+        Goal.objects.bulk_create(
+            (
+                Goal(
+                    category=category,
+                    board_id=category.board_id,
+                    user_id=category.user_id,
+                    title=f'Goal {i}',
+                    # Цели удаленных категорий архивные, как после GoalCategoryView.perform_destroy
+                    status=Goal.Status.archived if i % 4 == 0 or category.is_deleted else Goal.Status.todo,
+                )
+                for i, category in ((i, categories[i % len(categories)]) for i in range(goals_count))
+            ),
+            batch_size=1000,
+        )
+        return users[0].id
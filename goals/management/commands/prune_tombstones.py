@@ -0,0 +1,25 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from goals.models import Tombstone
+from goals.views.sync import SyncView
+
+
+class Command(BaseCommand):
+    help = 'Удаляет записи об удаленных объектах старше срока хранения синхронизации (GOALS_SYNC_TOMBSTONE_DAYS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Сколько записей удалять одним запросом')
+
+    def handle(self, *args, **options):
+        border = timezone.now() - datetime.timedelta(days=SyncView.tombstone_days)
+        # Записи только добавляются, поэтому старые лежат в начале индекса по id
+        old = Tombstone.objects.filter(updated__lt=border).order_by('id')
+
+        deleted = 0
+        while batch := list(old.values_list('id', flat=True)[:options['batch_size']]):
+            deleted += Tombstone.objects.filter(id__in=batch).delete()[0]
+
+        self.stdout.write(f'Удалено записей: {deleted}')
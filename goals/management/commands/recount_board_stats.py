@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from goals.models import Board
+from goals.stats import recount_boards_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики статистики досок по целям и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, action='append', dest='boards',
+                            help='id доски для пересчета, можно указать несколько раз. По умолчанию - все доски')
+        parser.add_argument('--batch-size', type=int, default=500, help='Сколько досок пересчитывать в одной транзакции')
+
+    def handle(self, *args, **options):
+        boards = Board.objects.order_by('id')
+        if options['boards']:
+            boards = boards.filter(id__in=options['boards'])
+        board_ids = list(boards.values_list('id', flat=True))
+
+        drifted = set()
+        for start in range(0, len(board_ids), options['batch_size']):
+            drifted |= recount_boards_stats(board_ids[start:start + options['batch_size']])
+
+        self.stdout.write(f'Досок пересчитано: {len(board_ids)}, с расхождением: {len(drifted)}')
+        if drifted:
+            self.stdout.write(f'Расхождения в досках: {", ".join(map(str, sorted(drifted)))}')
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.6 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status__in', [3, 4]), _negated=True)), fields=['due_date'], name='goals_goal_open_due_idx'),
+        ),
+    ]
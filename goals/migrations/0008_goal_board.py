@@ -0,0 +1,41 @@
+# Generated by Django 4.1.6 on 2026-10-18 03:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_board(apps, schema_editor):
+    Goal = apps.get_model('goals', 'Goal')
+    GoalCategory = apps.get_model('goals', 'GoalCategory')
+    GoalComment = apps.get_model('goals', 'GoalComment')
+
+    Goal.objects.update(
+        board_id=Subquery(GoalCategory.objects.filter(id=OuterRef('category_id')).values('board_id')[:1])
+    )
+    GoalComment.objects.update(
+        board_id=Subquery(Goal.objects.filter(id=OuterRef('goal_id')).values('board_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+    # NOT NULL и индекс в 0009: в PostgreSQL нельзя менять таблицу в одной транзакции
+    # с обновлением ее строк, пока не проверены отложенные внешние ключи
+
+    dependencies = [
+        ('goals', '0007_goal_open_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='board',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='goals', to='goals.board'),
+        ),
+        migrations.AddField(
+            model_name='goalcomment',
+            name='board',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='comments', to='goals.board'),
+        ),
+        migrations.RunPython(fill_board, migrations.RunPython.noop),
+    ]
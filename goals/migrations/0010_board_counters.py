@@ -0,0 +1,73 @@
+# Generated by Django 4.1.6 on 2026-10-18 04:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+# Значения Goal.Status: todo, in_progress и archived
+OPEN_STATUSES = (1, 2)
+ARCHIVED = 4
+
+
+def fill_counters(apps, schema_editor):
+    Goal = apps.get_model('goals', 'Goal')
+    BoardGoalCounter = apps.get_model('goals', 'BoardGoalCounter')
+    BoardDueCounter = apps.get_model('goals', 'BoardDueCounter')
+
+    goals = Goal.objects.exclude(status=ARCHIVED).order_by()
+    BoardGoalCounter.objects.bulk_create(
+        (
+            BoardGoalCounter(board_id=row['board_id'], status=row['status'], priority=row['priority'], count=row['count'])
+            for row in goals.values('board_id', 'status', 'priority').annotate(count=Count('id'))
+        ),
+        batch_size=1000,
+    )
+    BoardDueCounter.objects.bulk_create(
+        (
+            BoardDueCounter(board_id=row['board_id'], due_date=row['due_date'], count=row['count'])
+            for row in goals.filter(status__in=OPEN_STATUSES, due_date__isnull=False).values(
+                'board_id', 'due_date'
+            ).annotate(count=Count('id'))
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0009_goal_board_not_null'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardDueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='due_counters', to='goals.board')),
+            ],
+            options={
+                'verbose_name': 'Счетчик сроков целей доски',
+                'verbose_name_plural': 'Счетчики сроков целей досок',
+                'unique_together': {('board', 'due_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BoardGoalCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'ToDO'), (2, 'in progress'), (3, 'done'), (4, 'archived')])),
+                ('priority', models.PositiveSmallIntegerField(choices=[(1, 'L'), (2, 'M'), (3, 'H'), (4, 'C')])),
+                ('count', models.IntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='goal_counters', to='goals.board')),
+            ],
+            options={
+                'verbose_name': 'Счетчик целей доски',
+                'verbose_name_plural': 'Счетчики целей досок',
+                'unique_together': {('board', 'status', 'priority')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+from collections import Counter
 
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, transaction
+from django.db.models import Count, QuerySet
 
 from core.models import User
 
@@ -49,6 +52,12 @@ class BoardParticipant(BaseModel):
 
     class Meta:
         unique_together = ('board', 'user')
+        indexes = [
+            # Роли пользователя по доскам (goals.roles) читаются только из индекса
+            models.Index(fields=['user', 'board', 'role'], name='goals_bp_user_board_role_idx'),
+            # Синхронизация (goals.views.sync): изменения досок пользователя после курсора
+            models.Index(fields=['board', 'updated', 'id'], name='goals_bp_board_updated_idx'),
+        ]
         verbose_name = 'Участник'
         verbose_name_plural = 'Участники'
 
@@ -64,6 +73,10 @@ class GoalCategory(BaseModel):
     )
 
     class Meta:
+        indexes = [
+            models.Index(fields=['board', 'title'], condition=models.Q(is_deleted=False), name='goals_cat_active_board_idx'),
+            models.Index(fields=['board', 'updated', 'id'], name='goals_cat_board_updated_idx'),
+        ]
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
 
@@ -97,23 +110,232 @@ class Goal(BaseModel):
         on_delete=models.RESTRICT,
         related_name='goals'
     )
+    # Копия category.board: списки и проверки прав фильтруют цели по доске без join категории
+    board = models.ForeignKey(Board, on_delete=models.PROTECT, related_name='goals', editable=False)
     status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.todo)
     priority = models.PositiveSmallIntegerField(choices=Priority.choices, default=Priority.low)
     due_date = models.DateField(null=True, blank=True)
     user = models.ForeignKey(User, on_delete=models.PROTECT)
+    # Заполняется триггером PostgreSQL из title и description (см. миграцию 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
+        indexes = [
+            # status=4 - Status.archived, архивные цели в списки не попадают
+            models.Index(fields=['board', 'title'], condition=~models.Q(status=4), name='goals_goal_active_board_idx'),
+            # Напоминания о сроках (команда remind_due_goals): только открытые цели со сроком, status 3 и 4 - done и archived
+            models.Index(fields=['due_date'], condition=models.Q(due_date__isnull=False) & ~models.Q(status__in=[3, 4]),
+                         name='goals_goal_open_due_idx'),
+            models.Index(fields=['board', 'updated', 'id'], name='goals_goal_board_updated_idx'),
+        ]
         verbose_name = 'Цель'
         verbose_name_plural = 'Цели'
 
+    # Поля, по которым цель учитывается в счетчиках доски (BoardGoalCounter, BoardDueCounter)
+    counter_fields = ('board_id', 'status', 'priority', 'due_date')
+    open_statuses = (Status.todo, Status.in_progress)
+
+    def get_counter_state(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.counter_fields)
+
+    def save(self, *args, **kwargs):
+        """
+        Доска цели берется из категории, при переносе в категорию другой доски вместе с целью
+        переносятся комментарии. Счетчики досок меняются в той же транзакции, что и цель,
+        от прежнего состояния из заблокированной строки цели
+        """
+
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            old_state = self.get_counted_state()
+            old_board_id = self.board_id
+            # Прежняя доска для сигнала bump_board_version_by_goal: ее версия тоже меняется
+            self.moved_from_board_id = None
+            if update_fields is None or 'category' in update_fields:
+                self.board_id = self.category.board_id
+                if update_fields is not None:
+                    kwargs['update_fields'] = update_fields = {*update_fields, 'board'}
+            if old_board_id is not None and old_board_id != self.board_id:
+                self.moved_from_board_id = old_board_id
+            super().save(*args, **kwargs)
+            if self.moved_from_board_id is not None:
+                self.comments.update(board_id=self.board_id, updated=self.updated)
+                # Участники прежней доски при синхронизации должны убрать цель у себя
+                Tombstone.objects.create(kind=Tombstone.Kind.goals, object_id=self.id, board_id=old_board_id)
+
+            new_state = self.get_counter_state()
+            if update_fields is not None and old_state is not None:
+                # Несохраненные поля в базе остались прежними
+                saved = {self._meta.get_field(name).attname for name in update_fields}
+                new_state = tuple(
+                    new if field in saved else old
+                    for field, new, old in zip(self.counter_fields, new_state, old_state)
+                )
+            if new_state != old_state:
+                delta = GoalCounterDelta()
+                delta.add(old_state, -1)
+                delta.add(new_state)
+                delta.save()
+
+    def get_counted_state(self) -> tuple | None:
+        """
+        Состояние цели, с которым она учтена в счетчиках, из базы, а не из загруженного экземпляра.
+        Строка блокируется до конца транзакции, поэтому параллельные изменения одной цели
+        применяют изменения счетчиков по очереди. None - цель еще не сохранена
+        """
+
+        if self._state.adding:
+            return None
+        return Goal.objects.select_for_update().filter(pk=self.pk).values_list(*self.counter_fields).first()
+
 
 class GoalComment(BaseModel):
     """Класс комментариев"""
 
     user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='comments')
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='comments')
+    # Копия goal.board, поддерживается в Goal.save
+    board = models.ForeignKey(Board, on_delete=models.PROTECT, related_name='comments', editable=False)
     text = models.TextField()
 
     class Meta:
+        indexes = [
+            models.Index(fields=['goal', '-created'], name='goals_comment_goal_idx'),
+            models.Index(fields=['board', 'updated', 'id'], name='goals_comment_updated_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+
+    def save(self, *args, **kwargs):
+        if self.board_id is None:
+            self.board_id = self.goal.board_id
+        super().save(*args, **kwargs)
+
+
+class CounterManager(models.Manager):
+    """Менеджер счетчиков: строка счетчика создается при первом обращении, значение меняется на дельту"""
+
+    def add(self, deltas: dict[tuple, int]):
+        """
+        Функция прибавляет дельты к счетчикам одним INSERT ... ON CONFLICT DO UPDATE
+        (PostgreSQL и SQLite). Ключ дельты - значения key_fields модели
+        """
+
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        fields = [self.model._meta.get_field(name) for name in (*self.model.key_fields, 'count')]
+        table = quote(self.model._meta.db_table)
+        columns = ', '.join(quote(field.column) for field in fields)
+        key_columns = ', '.join(quote(field.column) for field in fields[:-1])
+        row = f'({", ".join(["%s"] * len(fields))})'
+        count = quote('count')
+        sql = (
+            f'INSERT INTO {table} ({columns}) VALUES {", ".join([row] * len(deltas))} '
+            f'ON CONFLICT ({key_columns}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}'
+        )
+        # Одинаковый порядок строк, чтобы параллельные транзакции не ждали друг друга по кругу
+        params = [
+            field.get_db_prep_value(value, connection)
+            for key in sorted(deltas)
+            for field, value in zip(fields, (*key, deltas[key]))
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class BoardGoalCounter(models.Model):
+    """Число неархивных целей доски по статусу и приоритету"""
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='goal_counters')
+    status = models.PositiveSmallIntegerField(choices=Goal.Status.choices)
+    priority = models.PositiveSmallIntegerField(choices=Goal.Priority.choices)
+    count = models.IntegerField(default=0)
+
+    key_fields = ('board_id', 'status', 'priority')
+    objects = CounterManager()
+
+    class Meta:
+        unique_together = ('board', 'status', 'priority')
+        verbose_name = 'Счетчик целей доски'
+        verbose_name_plural = 'Счетчики целей досок'
+
+
+class BoardDueCounter(models.Model):
+    """Число открытых целей доски по сроку, из него считаются просроченные цели"""
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='due_counters')
+    due_date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    key_fields = ('board_id', 'due_date')
+    objects = CounterManager()
+
+    class Meta:
+        unique_together = ('board', 'due_date')
+        verbose_name = 'Счетчик сроков целей доски'
+        verbose_name_plural = 'Счетчики сроков целей досок'
+
+
+class GoalCounterDelta:
+    """
+    Изменения счетчиков досок от создания, изменения и архивации целей. Архивные цели
+    в счетчиках не учитываются, в счетчиках сроков - только открытые цели со сроком
+    """
+
+    def __init__(self):
+        self.goals: Counter[tuple] = Counter()
+        self.due: Counter[tuple] = Counter()
+
+    def add(self, state: tuple | None, count: int = 1):
+        """Функция учитывает count целей в состоянии state (Goal.get_counter_state)"""
+
+        if state is None:
+            return
+        board_id, status, priority, due_date = state
+        if status == Goal.Status.archived:
+            return
+        self.goals[board_id, status, priority] += count
+        if due_date is not None and status in Goal.open_statuses:
+            self.due[board_id, due_date] += count
+
+    def add_queryset(self, goals: QuerySet, sign: int = 1):
+        """Функция учитывает все цели выборки одним запросом с группировкой"""
+
+        fields = Goal.counter_fields
+        for *state, count in goals.order_by().values(*fields).annotate(count=Count('id')).values_list(*fields, 'count'):
+            self.add(tuple(state), sign * count)
+
+    def save(self):
+        BoardGoalCounter.objects.add(self.goals)
+        BoardDueCounter.objects.add(self.due)
+
+
+class Tombstone(BaseModel):
+    """
+    Запись об удаленном из доски объекте для синхронизации клиентов (goals.views.sync):
+    удаленные комментарии и участники, удаленные и перенесенные на другую доску цели
+    """
+
+    class Kind(models.TextChoices):
+        participants = 'participants', 'Участник'
+        goals = 'goals', 'Цель'
+        comments = 'comments', 'Комментарий'
+
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='+')
+    # Удаленный участник узнает, что доска ему больше недоступна
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'updated', 'id'], name='goals_tombstone_board_idx'),
+            models.Index(fields=['user', 'updated', 'id'], condition=models.Q(user__isnull=False),
+                         name='goals_tombstone_user_idx'),
+        ]
+        verbose_name = 'Удаленный объект'
+        verbose_name_plural = 'Удаленные объекты'
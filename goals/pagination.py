@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+from datetime import date
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) пагинация по полю сортировки вьюхи с 'id' в качестве
+    уникального дополнения. Не делает COUNT(*) и не использует OFFSET, поэтому
+    стоимость любой страницы такая же, как у первой
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 100
+    max_limit = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.field = self.get_ordering_field(queryset)
+        self.cursor = self.decode_cursor(request)
+
+        is_reverse = bool(self.cursor and self.cursor['r'])
+        field_name, descending = self.field.lstrip('-'), self.field.startswith('-')
+        if is_reverse:
+            descending = not descending
+
+        direction = '-' if descending else ''
+        queryset = queryset.order_by(f'{direction}{field_name}', f'{direction}id')
+        if self.cursor:
+            lookup = 'lt' if descending else 'gt'
+            value = self.get_cursor_value(queryset, field_name)
+            queryset = queryset.filter(
+                Q(**{f'{field_name}__{lookup}': value}) |
+                Q(**{field_name: value, f'id__{lookup}': self.cursor['id']})
+            )
+
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if is_reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    @staticmethod
+    def get_ordering_field(queryset) -> str:
+        """Функция возвращает первое поле сортировки, уже применённой OrderingFilter'ом"""
+
+        ordering = [field for field in queryset.query.order_by if field.lstrip('-') not in ('id', 'pk')]
+        return ordering[0] if ordering else 'id'
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], is_reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, '')
+        return self.encode_cursor(self.page[0], is_reverse=True)
+
+    def encode_cursor(self, obj, is_reverse: bool) -> str:
+        value = attrgetter(self.field.lstrip('-'))(obj)
+        if isinstance(value, date):
+            value = value.isoformat()
+        raw = json.dumps({'v': value, 'id': obj.id, 'r': is_reverse}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request) -> dict | None:
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            if not {'v', 'id', 'r'} <= cursor.keys() or type(cursor['id']) is not int or type(cursor['r']) is not bool:
+                raise ValueError
+        except (TypeError, ValueError, AttributeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_cursor_value(self, queryset, field_name: str):
+        """
+        Функция возвращает значение поля сортировки из курсора, приведенное к типу поля модели.
+        Курсор приходит от клиента, и значение не того типа не должно дойти до запроса к БД
+        """
+
+        value = self.cursor['v']
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            value = queryset.model._meta.get_field(field_name).to_python(value)
+        except FieldDoesNotExist:
+            # Сортировка по аннотации (ранг поиска): значение остается числом или строкой из курсора
+            return value
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value
+
+
+class LimitOffsetOrKeysetPagination(LimitOffsetPagination):
+    """
+    По умолчанию LimitOffset пагинация. Клиент переключается на keyset
+    пагинацию, передав параметр 'cursor' (пустой для первой страницы)
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
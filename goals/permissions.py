@@ -2,6 +2,7 @@
 from rest_framework import permissions
 
 from goals.models import BoardParticipant, GoalCategory, Board, Goal, GoalComment
+from goals.roles import WRITE_ROLES, has_board_role
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -20,33 +21,30 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 class BoardPermissions(permissions.IsAuthenticated):
     """Класс permission доски"""
     def has_object_permission(self, request, view, obj: Board):
-        _filters: dict = {'user': request.user, 'board': obj}
-        if request.method not in permissions.SAFE_METHODS:
-            _filters['role'] = BoardParticipant.Role.owner
+        if request.method in permissions.SAFE_METHODS:
+            return has_board_role(request, obj.id)
 
-        return BoardParticipant.objects.filter(**_filters).exists()
+        return has_board_role(request, obj.id, [BoardParticipant.Role.owner])
 
 
 class GoalCategoryPermissions(permissions.IsAuthenticated):
     """Класс permission категорий"""
 
     def has_object_permission(self, request, view, obj: GoalCategory):
-        _filters: dict = {'user_id': request.user.id, 'board_id': obj.board_id}
-        if request.method not in permissions.SAFE_METHODS:
-            _filters['role__in'] = [BoardParticipant.Role.owner, BoardParticipant.Role.writer]
+        if request.method in permissions.SAFE_METHODS:
+            return has_board_role(request, obj.board_id)
 
-        return BoardParticipant.objects.filter(**_filters).exists()
+        return has_board_role(request, obj.board_id, WRITE_ROLES)
 
 
 class GoalPermissions(permissions.IsAuthenticated):
     """Класс permission целей"""
 
     def has_object_permission(self, request, view, obj: Goal):
-        _filters: dict = {'user_id': request.user.id, 'board_id': obj.category.board_id}
-        if request.method not in permissions.SAFE_METHODS:
-            _filters['role__in'] = [BoardParticipant.Role.owner, BoardParticipant.Role.writer]
+        if request.method in permissions.SAFE_METHODS:
+            return has_board_role(request, obj.board_id)
 
-        return BoardParticipant.objects.filter(**_filters).exists()
+        return has_board_role(request, obj.board_id, WRITE_ROLES)
 
 
 class CommentsPermissions(permissions.IsAuthenticated):
@@ -0,0 +1,91 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from goals.roles import get_board_roles
+
+BOARD_VERSION_CACHE_KEY = 'goals:board_version:{board_id}'
+RESPONSE_CACHE_KEY = 'goals:response:{name}:{user_id}:{digest}'
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+
+def _version_key(board_id: int) -> str:
+    return BOARD_VERSION_CACHE_KEY.format(board_id=board_id)
+
+
+def get_board_versions(board_ids) -> dict[int, int]:
+    """
+    Функция возвращает версии досок одним обращением к кэшу. Пропавшая из кэша версия
+    заводится заново от текущего времени в наносекундах, поэтому никогда не совпадает
+    с прежней версией доски и старые ответы из кэша не отдаются
+    """
+
+    keys = {_version_key(board_id): board_id for board_id in board_ids}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_board_versions(*board_ids: int) -> None:
+    """
+    Функция меняет версии досок после коммита транзакции: пока изменения не видны
+    другим запросам, новая версия не должна появиться, иначе под ней закэшируют старые данные
+    """
+
+    def bump():
+        for board_id in set(board_ids):
+            try:
+                cache.incr(_version_key(board_id))
+            except ValueError:
+                cache.add(_version_key(board_id), time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+class CachedListMixin:
+    """
+    Кэш ответов списков, зависящих от досок пользователя. Ключ - пользователь, запрос
+    и версии всех его досок, поэтому любое изменение доски дает новый ключ.
+    Промах по одному ключу пересчитывает один запрос, остальные ждут его результат
+    """
+
+    cache_lock_timeout = 10
+    cache_wait_timeout = 2
+    cache_wait_step = 0.05
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        if (data := cache.get(key)) is not None:
+            return Response(data)
+
+        locked = cache.add(f'{key}:lock', 1, self.cache_lock_timeout)
+        if not locked and (data := self._wait_for_cache(key)) is not None:
+            return Response(data)
+
+        try:
+            response = super().list(request, *args, **kwargs)
+            cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(f'{key}:lock')
+        return response
+
+    def get_response_cache_key(self, request) -> str:
+        versions = sorted(get_board_versions(get_board_roles(request)).items())
+        digest = hashlib.md5(repr((request.get_full_path(), versions)).encode(), usedforsecurity=False).hexdigest()
+        return RESPONSE_CACHE_KEY.format(name=type(self).__name__, user_id=request.user.id, digest=digest)
+
+    def _wait_for_cache(self, key: str):
+        """Функция ждет, пока другой запрос положит ответ в кэш. None - не дождались, считаем сами"""
+
+        deadline = time.monotonic() + self.cache_wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.cache_wait_step)
+            if (data := cache.get(key)) is not None:
+                return data
+        return None
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from goals.models import BoardParticipant
+
+BOARD_ROLES_CACHE_KEY = 'goals:board_roles:{user_id}'
+BOARD_ROLES_CACHE_TIMEOUT = 60 * 60
+
+WRITE_ROLES = (BoardParticipant.Role.owner, BoardParticipant.Role.writer)
+
+
+def _cache_key(user_id: int) -> str:
+    return BOARD_ROLES_CACHE_KEY.format(user_id=user_id)
+
+
+def get_board_roles(request) -> dict[int, int]:
+    """
+    Функция возвращает словарь {board_id: role} текущего пользователя.
+    Словарь загружается один раз за запрос и хранится в кэше между запросами
+    """
+
+    if (roles := getattr(request, '_board_roles', None)) is not None:
+        return roles
+
+    user_id = request.user.id
+    roles = cache.get(_cache_key(user_id))
+    if roles is None:
+        roles = dict(BoardParticipant.objects.filter(user_id=user_id).values_list('board_id', 'role'))
+        cache.set(_cache_key(user_id), roles, BOARD_ROLES_CACHE_TIMEOUT)
+
+    request._board_roles = roles
+    return roles
+
+
+def has_board_role(request, board_id: int, roles=None) -> bool:
+    """Функция проверяет, что пользователь участник доски (и имеет одну из ролей roles, если они переданы)"""
+
+    role = get_board_roles(request).get(board_id)
+    if role is None:
+        return False
+    return roles is None or role in roles
+
+
+def invalidate_board_roles(*user_ids: int) -> None:
+    """
+    Функция сбрасывает закэшированные роли пользователей.
+    Внутри транзакции кэш сбрасывается повторно после коммита, чтобы
+    параллельный запрос не успел закэшировать старые роли
+    """
+
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,10 +1,15 @@
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers, exceptions
 from rest_framework.exceptions import PermissionDenied
 
 from core.models import User
 from core.serializers import ProfileSerializer
-from goals.models import GoalCategory, GoalComment, Goal, Board, BoardParticipant
+from goals.models import GoalCategory, GoalComment, Goal, Board, BoardParticipant, Tombstone
+from goals.response_cache import bump_board_versions
+from goals.roles import WRITE_ROLES, has_board_role, invalidate_board_roles
+from goals.stats import get_boards_stats
 
 
 class GoalCategoryCreateSerializer(serializers.ModelSerializer):
@@ -21,11 +26,7 @@ class GoalCategoryCreateSerializer(serializers.ModelSerializer):
         if value.is_deleted:
             raise serializers.ValidationError('Board is deleted')
 
-        if not BoardParticipant.objects.filter(
-                board=value,
-                role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer],
-                user_id=self.context['request'].user.id
-        ):
+        if not has_board_role(self.context['request'], value.id, WRITE_ROLES):
             raise PermissionDenied
         return value
 
@@ -54,7 +55,7 @@ class GoalCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Goal
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('id', 'created', 'updated', 'user')
 
     def validate_category(self, value: GoalCategory):
@@ -63,21 +64,30 @@ class GoalCreateSerializer(serializers.ModelSerializer):
         пользователь создателем категории, или является writer'ом
         """
 
-        if not BoardParticipant.objects.filter(
-                board_id=value.board_id,
-                role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer],
-                user_id=self.context['request'].user.id
-        ):
+        if not has_board_role(self.context['request'], value.board_id, WRITE_ROLES):
             raise PermissionDenied
         return value
 
 
+class GoalBulkCreateItemSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор одной цели при массовом создании. Категория принимается как id,
+    категории и права на доски проверяются сразу для всего списка во вьюхе
+    """
+
+    category = serializers.IntegerField()
+
+    class Meta:
+        model = Goal
+        fields = ('title', 'description', 'category', 'status', 'priority', 'due_date')
+
+
 class GoalSerializer(serializers.ModelSerializer):
     """Сериализатор цели"""
 
     class Meta:
         model = Goal
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('id', 'created', 'updated', 'user')
 
     def validate_category(self, value: GoalCategory):
@@ -88,9 +98,43 @@ class GoalSerializer(serializers.ModelSerializer):
 
         if self.context['request'].user.id != value.user_id:
             raise exceptions.PermissionDenied
+        # Списки целей не проверяют категорию: цели удаленных категорий должны быть в архиве
+        if value.is_deleted:
+            raise serializers.ValidationError('Category is deleted')
         return value
 
 
+class GoalListSerializer(GoalSerializer):
+    """Сериализатор списка целей с рангом и подсветкой полнотекстового поиска"""
+
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    headline = serializers.CharField(source='search_headline', read_only=True)
+
+
+class GoalBulkUpdateSerializer(serializers.Serializer):
+    """Сериализатор массового изменения целей: список id и изменяемые поля"""
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=Goal.Status.choices, required=False)
+    priority = serializers.ChoiceField(choices=Goal.Priority.choices, required=False)
+    due_date = serializers.DateField(required=False, allow_null=True)
+    category = serializers.PrimaryKeyRelatedField(
+        queryset=GoalCategory.objects.filter(is_deleted=False), required=False
+    )
+
+    def validate_category(self, value: GoalCategory):
+        """Проверка, как и в GoalSerializer, что пользователь создатель категории"""
+
+        if self.context['request'].user.id != value.user_id:
+            raise exceptions.PermissionDenied
+        return value
+
+    def validate(self, attrs: dict) -> dict:
+        if len(attrs) == 1:
+            raise serializers.ValidationError('Nothing to update')
+        return attrs
+
+
 class GoalCommentCreateSerializer(serializers.ModelSerializer):
     """Сериализатор создания комментария"""
 
@@ -107,11 +151,7 @@ class GoalCommentCreateSerializer(serializers.ModelSerializer):
         Проверяет, является ли пользователь создателем категории целей или writer'ом
         """
 
-        if not BoardParticipant.objects.filter(
-                board=value.category.board_id,
-                role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer],
-                user_id=self.context['request'].user.id
-        ):
+        if not has_board_role(self.context['request'], value.board_id, WRITE_ROLES):
             raise PermissionDenied
         return value
 
@@ -136,11 +176,26 @@ class BoardCreateSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class UsernameField(serializers.SlugRelatedField):
+    """
+    Поле пользователя по username. При записи возвращает сам username,
+    пользователи ищутся одним запросом в BoardSerializer.validate_participants
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field='username', queryset=User.objects.all(), **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return data
+
+
 class BoardParticipantSerializer(serializers.ModelSerializer):
     """Сериализатор других участников доски"""
 
     role = serializers.ChoiceField(required=True, choices=BoardParticipant.Role.choices[1:])
-    user = serializers.SlugRelatedField(slug_field='username', queryset=User.objects.all())
+    user = UsernameField()
 
     class Meta:
         model = BoardParticipant
@@ -158,32 +213,65 @@ class BoardSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'created', 'updated')
 
+    def to_representation(self, instance: Board):
+        prefetch_related_objects(
+            [instance], Prefetch('participants', queryset=BoardParticipant.objects.select_related('user'))
+        )
+        return super().to_representation(instance)
+
+    def validate_participants(self, value: list[dict]) -> list[dict]:
+        """Функция заменяет username участников на пользователей, загружая их одним запросом"""
+
+        users = User.objects.in_bulk({part['user'] for part in value}, field_name='username')
+        if missing := sorted({part['user'] for part in value} - users.keys()):
+            raise serializers.ValidationError(f'Object with username={missing[0]} does not exist.')
+
+        return [{**part, 'user': users[part['user']]} for part in value]
+
     def update(self, instance, validated_data):
-        """Функция редактирования и добавления участников доски"""
+        """
+        Функция редактирования и добавления участников доски. Участники синхронизируются
+        как разница множеств: один bulk_create, один bulk_update и одно удаление
+        """
 
         owner = self.context['request'].user
         new_participants = validated_data.pop('participants', [])
-        new_by_id = {part['user'].id: part for part in new_participants}
+        new_roles = {part['user'].id: part['role'] for part in new_participants if part['user'].id != owner.id}
 
-        old_participants = instance.participants.exclude(user=owner)
         with transaction.atomic():
-            for old_participant in old_participants:
-                if old_participant.user_id not in new_by_id:
-                    old_participant.delete()
-                else:
-                    if old_participant.role != new_by_id[old_participant.user_id]['role']:
-                        old_participant.role = new_by_id[old_participant.user_id]['role']
-                        old_participant.save()
-                    new_by_id.pop(old_participant.user_id)
-            for new_part in new_by_id.values():
-                BoardParticipant.objects.create(
-                    board=instance, user=new_part['user'], role=new_part['role']
+            old_participants = {part.user_id: part for part in instance.participants.exclude(user=owner)}
+
+            removed_ids = old_participants.keys() - new_roles.keys()
+            if removed_ids:
+                instance.participants.filter(user_id__in=removed_ids).delete()
+                # Удаленный участник по этой записи узнает при синхронизации, что доска ему недоступна
+                Tombstone.objects.bulk_create(
+                    Tombstone(kind=Tombstone.Kind.participants, object_id=old_participants[user_id].id,
+                              board=instance, user_id=user_id)
+                    for user_id in removed_ids
                 )
 
+            changed = [
+                part for user_id, part in old_participants.items()
+                if user_id in new_roles and part.role != new_roles[user_id]
+            ]
+            for part in changed:
+                part.role = new_roles[part.user_id]
+                part.updated = timezone.now()
+            BoardParticipant.objects.bulk_update(changed, fields=('role', 'updated'))
+
+            BoardParticipant.objects.bulk_create(
+                BoardParticipant(board=instance, user_id=user_id, role=role)
+                for user_id, role in new_roles.items() if user_id not in old_participants
+            )
+
             if title := validated_data.get('title'):
                 instance.title = title
                 instance.save()
 
+            invalidate_board_roles(owner.id, *old_participants, *new_roles)
+            bump_board_versions(instance.id)
+
         return instance
 
 
@@ -192,3 +280,19 @@ class BoardListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Board
         fields = '__all__'
+
+
+class BoardStatsListSerializer(serializers.ListSerializer):
+    """Список досок со статистикой: счетчики всех досок страницы читаются одним обращением"""
+
+    def to_representation(self, data):
+        boards = list(data)
+        stats = get_boards_stats([board.id for board in boards])
+        return [{**self.child.to_representation(board), 'stats': stats[board.id]} for board in boards]
+
+
+class BoardListWithStatsSerializer(BoardListSerializer):
+    """Сериализатор списка досок со статистикой целей (?stats=true)"""
+
+    class Meta(BoardListSerializer.Meta):
+        list_serializer_class = BoardStatsListSerializer
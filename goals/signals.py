@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import User
+from core.serializers import ProfileSerializer
+from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment, GoalCounterDelta, Tombstone
+from goals.response_cache import bump_board_versions
+from goals.roles import invalidate_board_roles
+
+
+@receiver([post_save, post_delete], sender=BoardParticipant)
+def reset_board_roles(sender, instance: BoardParticipant, **kwargs):
+    """Сброс закэшированных ролей участника при изменении или удалении"""
+
+    invalidate_board_roles(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Board)
+def bump_board_version(sender, instance: Board, **kwargs):
+    """Новая версия доски при любом изменении доски, ее участников, категорий и целей"""
+
+    bump_board_versions(instance.id)
+
+
+@receiver([post_save, post_delete], sender=BoardParticipant)
+@receiver([post_save, post_delete], sender=GoalCategory)
+def bump_board_version_by_board_id(sender, instance: BoardParticipant | GoalCategory, **kwargs):
+    bump_board_versions(instance.board_id)
+
+
+@receiver(post_save, sender=User)
+def bump_board_version_by_author(sender, instance: User, created: bool, update_fields=None, **kwargs):
+    """Закэшированный список категорий содержит профили авторов: их изменение меняет версии досок"""
+
+    if created or (update_fields is not None and not {*update_fields} & {*ProfileSerializer.Meta.fields}):
+        return
+    bump_board_versions(*GoalCategory.objects.filter(user=instance).values_list('board_id', flat=True).distinct())
+
+
+@receiver([post_save, post_delete], sender=Goal)
+def bump_board_version_by_goal(sender, instance: Goal, **kwargs):
+    """При переносе цели на другую доску меняется версия и прежней доски (Goal.save)"""
+
+    bump_board_versions(instance.board_id, *filter(None, [getattr(instance, 'moved_from_board_id', None)]))
+
+
+@receiver(pre_delete, sender=Goal)
+def lock_deleted_goal(sender, instance: Goal, **kwargs):
+    """Удаление идет в транзакции: строка цели блокируется и ее состояние запоминается до удаления"""
+
+    instance.deleted_state = instance.get_counted_state()
+
+
+@receiver(post_delete, sender=Goal)
+def uncount_deleted_goal(sender, instance: Goal, **kwargs):
+    """Удаленная цель (например, из админки) убирается из счетчиков доски"""
+
+    delta = GoalCounterDelta()
+    delta.add(getattr(instance, 'deleted_state', None), -1)
+    delta.save()
+
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=GoalComment)
+def create_tombstone(sender, instance: Goal | GoalComment, **kwargs):
+    """
+    Удаленные цели и комментарии остаются в синхронизации записью Tombstone. Участников
+    удаляет только BoardSerializer.update, записи о них создаются там одним запросом
+    """
+
+    kind = Tombstone.Kind.goals if sender is Goal else Tombstone.Kind.comments
+    Tombstone.objects.create(kind=kind, object_id=instance.id, board_id=instance.board_id)
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from goals.models import BoardDueCounter, BoardGoalCounter, Goal, GoalCounterDelta
+
+
+def get_boards_stats(board_ids) -> dict[int, dict]:
+    """
+    Функция возвращает статистику досок по счетчикам: число целей по статусам и приоритетам
+    и число просроченных целей. Таблица целей не читается, два запроса на любое число досок
+    """
+
+    stats = {
+        board_id: {
+            'total': 0,
+            'by_status': {status.name: 0 for status in Goal.Status if status != Goal.Status.archived},
+            'by_priority': {priority.name: 0 for priority in Goal.Priority},
+            'overdue': 0,
+        }
+        for board_id in board_ids
+    }
+
+    counters = BoardGoalCounter.objects.filter(board_id__in=stats).exclude(count=0)
+    for board_id, status, priority, count in counters.values_list('board_id', 'status', 'priority', 'count'):
+        stats[board_id]['total'] += count
+        stats[board_id]['by_status'][Goal.Status(status).name] += count
+        stats[board_id]['by_priority'][Goal.Priority(priority).name] += count
+
+    overdue = BoardDueCounter.objects.filter(
+        board_id__in=stats, due_date__lt=timezone.localdate()
+    ).values('board_id').annotate(overdue=Sum('count')).values_list('board_id', 'overdue')
+    for board_id, count in overdue:
+        stats[board_id]['overdue'] = count
+    return stats
+
+
+def recount_boards_stats(board_ids) -> set[int]:
+    """
+    Функция пересчитывает счетчики досок по таблице целей и возвращает доски, у которых
+    счетчики разошлись с целями. Счетчики меняются в одной транзакции с пересчетом
+    """
+
+    with transaction.atomic():
+        delta = GoalCounterDelta()
+        delta.add_queryset(Goal.objects.filter(board_id__in=board_ids))
+        expected_goals = {key: count for key, count in delta.goals.items() if count}
+        expected_due = {key: count for key, count in delta.due.items() if count}
+
+        goal_counters = BoardGoalCounter.objects.filter(board_id__in=board_ids)
+        due_counters = BoardDueCounter.objects.filter(board_id__in=board_ids)
+        actual_goals = {
+            (board_id, status, priority): count
+            for board_id, status, priority, count in goal_counters.exclude(count=0).values_list(
+                'board_id', 'status', 'priority', 'count'
+            )
+        }
+        actual_due = {
+            (board_id, due_date): count
+            for board_id, due_date, count in due_counters.exclude(count=0).values_list('board_id', 'due_date', 'count')
+        }
+
+        drifted = {
+            key[0] for key in expected_goals.keys() | actual_goals.keys()
+            if expected_goals.get(key) != actual_goals.get(key)
+        } | {
+            key[0] for key in expected_due.keys() | actual_due.keys()
+            if expected_due.get(key) != actual_due.get(key)
+        }
+
+        # Пустые строки счетчиков тоже убираются, чтобы таблица не росла от старых сроков
+        goal_counters.delete()
+        due_counters.delete()
+        BoardGoalCounter.objects.bulk_create(
+            BoardGoalCounter(board_id=board_id, status=status, priority=priority, count=count)
+            for (board_id, status, priority), count in expected_goals.items()
+        )
+        BoardDueCounter.objects.bulk_create(
+            BoardDueCounter(board_id=board_id, due_date=due_date, count=count)
+            for (board_id, due_date), count in expected_due.items()
+        )
+    return drifted
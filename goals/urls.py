@@ -8,12 +8,15 @@ urlpatterns = [
     path('board/create', views.BoardCreateView.as_view(), name='create-board'),
     path('board/list', views.BoardListView.as_view(), name='board-list'),
     path('board/<int:pk>', views.BoardView.as_view(), name='board'),
+    path('board/<int:pk>/stats', views.BoardStatsView.as_view(), name='board-stats'),
 
     path('goal_category/create', views.GoalCategoryCreateView.as_view(), name='create-category'),
     path('goal_category/list', views.GoalCategoryListView.as_view(), name='list-categories'),
     path('goal_category/<pk>', views.GoalCategoryView.as_view(), name='retrieve-update-destroy-category'),
 
     path('goal/create', views.GoalCreateView.as_view(), name='create-goal'),
+    path('goal/bulk_create', views.GoalBulkCreateView.as_view(), name='bulk-create-goals'),
+    path('goal/bulk_update', views.GoalBulkUpdateView.as_view(), name='bulk-update-goals'),
     path('goal/list', views.GoalListView.as_view(), name='list-goals'),
     path('goal/<pk>', views.GoalView.as_view(), name='retrieve-update-destroy-goal'),
 
@@ -24,4 +27,6 @@ urlpatterns = [
     path('goal_comment/create', GoalCommentCreateView.as_view(), name='create-comment'),
     path('goal_comment/list', GoalCommentListView.as_view(), name='list-comment'),
     path('goal_comment/<pk>', GoalCommentView.as_view(), name='retrieve-update-destroy-comment'),
+
+    path('sync', views.SyncView.as_view(), name='sync'),
 ]
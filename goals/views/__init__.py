@@ -1,20 +1,25 @@
-from .board import BoardCreateView, BoardListView, BoardView
+from .board import BoardCreateView, BoardListView, BoardStatsView, BoardView
 from .other import (
-    GoalCategoryCreateView, GoalCategoryListView, GoalCategoryView, GoalCommentCreateView, GoalCommentListView,
-    GoalCommentView, GoalCreateView, GoalListView, GoalView,
+    GoalBulkCreateView, GoalBulkUpdateView, GoalCategoryCreateView, GoalCategoryListView, GoalCategoryView,
+    GoalCommentCreateView, GoalCommentListView, GoalCommentView, GoalCreateView, GoalListView, GoalView,
 )
+from .sync import SyncView
 
 __all__ = [
     'BoardCreateView',
     'BoardListView',
+    'BoardStatsView',
     'BoardView',
     'GoalCategoryCreateView',
     'GoalCategoryListView',
     'GoalCategoryView',
     'GoalCreateView',
+    'GoalBulkCreateView',
+    'GoalBulkUpdateView',
     'GoalListView',
     'GoalView',
     'GoalCommentCreateView',
     'GoalCommentListView',
     'GoalCommentView',
+    'SyncView',
 ]
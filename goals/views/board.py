@@ -1,9 +1,15 @@
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import filters, generics, permissions
+from rest_framework.response import Response
 
-from goals.models import Board, BoardParticipant, Goal
+from goals.conditional import ConditionalGetMixin
+from goals.models import Board, BoardDueCounter, BoardGoalCounter, BoardParticipant, Goal
 from goals.permissions import BoardPermissions
-from goals.serializers import BoardCreateSerializer, BoardListSerializer, BoardSerializer
+from goals.response_cache import CachedListMixin, get_board_versions
+from goals.roles import get_board_roles
+from goals.serializers import BoardCreateSerializer, BoardListSerializer, BoardListWithStatsSerializer, BoardSerializer
+from goals.stats import get_boards_stats
 
 
 class BoardCreateView(generics.CreateAPIView):
@@ -17,7 +23,7 @@ class BoardCreateView(generics.CreateAPIView):
         BoardParticipant.objects.create(user=self.request.user, board=serializer.save())
 
 
-class BoardListView(generics.ListAPIView):
+class BoardListView(ConditionalGetMixin, CachedListMixin, generics.ListAPIView):
     """Вью отображения списка досок"""
 
     model = Board
@@ -33,8 +39,25 @@ class BoardListView(generics.ListAPIView):
             is_deleted=False
         )
 
+    def get_serializer_class(self):
+        return BoardListWithStatsSerializer if self.with_stats() else BoardListSerializer
 
-class BoardView(generics.RetrieveUpdateDestroyAPIView):
+    def get_etag_parts(self) -> tuple:
+        parts = self.get_queryset_version(self.get_queryset())
+        if self.with_stats():
+            # Статистика меняется вместе с целями (версии досок) и с датой (просроченные цели)
+            parts += (timezone.localdate(), sorted(get_board_versions(get_board_roles(self.request)).items()))
+        return parts
+
+    def get_response_cache_key(self, request) -> str:
+        key = super().get_response_cache_key(request)
+        return f'{key}:{timezone.localdate()}' if self.with_stats() else key
+
+    def with_stats(self) -> bool:
+        return self.request.query_params.get('stats', '').lower() in ('1', 'true')
+
+
+class BoardView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """Вью отображения, редактирования и удаления доски"""
 
     model = Board
@@ -44,10 +67,41 @@ class BoardView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Board.objects.filter(is_deleted=False)
 
+    def get_object(self) -> Board:
+        # ETag и ответ строятся по одной доске, права проверяются один раз
+        if not hasattr(self, '_board'):
+            self._board = super().get_object()
+        return self._board
+
+    def get_etag_parts(self) -> tuple:
+        board = self.get_object()
+        return board.updated, *self.get_queryset_version(board.participants.all())
+
     def perform_destroy(self, instance: Board):
         with transaction.atomic():
             instance.is_deleted = True
-            instance.save(update_fields=('is_deleted',))
-            instance.categories.update(is_deleted=True)
-            Goal.objects.filter(category__board=instance).update(status=Goal.Status.archived)
+            instance.save(update_fields=('is_deleted', 'updated'))
+            # update() не трогает auto_now, а по updated клиенты синхронизируют удаления
+            now = timezone.now()
+            instance.categories.update(is_deleted=True, updated=now)
+            Goal.objects.filter(board=instance).exclude(status=Goal.Status.archived).update(
+                status=Goal.Status.archived, updated=now
+            )
+            # Все цели доски в архиве, счетчики доски обнуляются целиком
+            BoardGoalCounter.objects.filter(board=instance).delete()
+            BoardDueCounter.objects.filter(board=instance).delete()
         return instance
+
+
+class BoardStatsView(generics.RetrieveAPIView):
+    """Вью статистики доски: число целей по статусам и приоритетам и просроченные цели"""
+
+    model = Board
+    permission_classes = [BoardPermissions]
+
+    def get_queryset(self):
+        return Board.objects.filter(is_deleted=False)
+
+    def retrieve(self, request, *args, **kwargs):
+        board = self.get_object()
+        return Response(get_boards_stats([board.id])[board.id])
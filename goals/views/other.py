@@ -1,14 +1,22 @@
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, generics
-
-from goals.filters import GoalDateFilter
-from goals.models import Goal, GoalCategory, GoalComment
+from rest_framework import filters, generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from goals.conditional import ConditionalGetMixin
+from goals.filters import GoalDateFilter, GoalFullTextSearchFilter
+from goals.jobs import notify_goal_comment
+from goals.models import Goal, GoalCategory, GoalComment, GoalCounterDelta, Tombstone
+from goals.pagination import LimitOffsetOrKeysetPagination
+from goals.roles import WRITE_ROLES, get_board_roles
 from goals.permissions import CommentsPermissions, GoalCategoryPermissions, GoalPermissions, IsOwnerOrReadOnly
+from goals.response_cache import CachedListMixin, bump_board_versions, get_board_versions
 from goals.serializers import (
-    GoalCategoryCreateSerializer, GoalCategorySerializer, GoalCommentCreateSerializer, GoalCommentSerializer,
-    GoalCreateSerializer, GoalSerializer,
+    GoalBulkCreateItemSerializer, GoalBulkUpdateSerializer, GoalCategoryCreateSerializer, GoalCategorySerializer,
+    GoalCommentCreateSerializer, GoalCommentSerializer, GoalCreateSerializer, GoalListSerializer, GoalSerializer,
 )
 
 
@@ -19,12 +27,13 @@ class GoalCategoryCreateView(generics.CreateAPIView):
     serializer_class = GoalCategoryCreateSerializer
 
 
-class GoalCategoryListView(generics.ListAPIView):
+class GoalCategoryListView(CachedListMixin, generics.ListAPIView):
     """Вью отображения списка категорий"""
 
     model = GoalCategory
     permission_classes = [GoalCategoryPermissions]
     serializer_class = GoalCategorySerializer
+    pagination_class = LimitOffsetOrKeysetPagination
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     filterset_fields = ['board']
     ordering_fields = ['title', 'created']
@@ -54,8 +63,16 @@ class GoalCategoryView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance: GoalCategory):
         with transaction.atomic():
             instance.is_deleted = True
-            instance.save(update_fields=('is_deleted',))
-            instance.goals.update(status=Goal.Status.archived)
+            instance.save(update_fields=('is_deleted', 'updated'))
+            # Цели блокируются до подсчета: параллельное изменение цели не разойдется со счетчиками
+            goals = Goal.objects.filter(id__in=list(
+                instance.goals.select_for_update().exclude(status=Goal.Status.archived).values_list('id', flat=True)
+            ))
+            delta = GoalCounterDelta()
+            delta.add_queryset(goals, -1)
+            delta.save()
+            # update() не трогает auto_now, а по updated клиенты синхронизируют удаления
+            goals.update(status=Goal.Status.archived, updated=timezone.now())
         return instance
 
 
@@ -66,24 +83,162 @@ class GoalCreateView(generics.CreateAPIView):
     permission_classes = [GoalPermissions]
 
 
-class GoalListView(generics.ListAPIView):
+class GoalBulkCreateView(generics.GenericAPIView):
+    """
+    Вью массового создания целей. Принимает список целей, категории и права
+    на доски проверяет одним запросом на весь список и создает цели через bulk_create.
+    Невалидные элементы возвращаются в 'errors' с их индексом, остальные создаются.
+    С параметром ?atomic=true цели создаются только если валидны все элементы
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GoalBulkCreateItemSerializer
+    max_items = 1000
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            raise ValidationError('Expected a list of goals')
+        if len(request.data) > self.max_items:
+            raise ValidationError(f'Ensure this list has no more than {self.max_items} goals')
+
+        errors, valid_items = {}, []
+        for index, item in enumerate(request.data):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid_items.append((index, serializer.validated_data))
+            else:
+                errors[index] = serializer.errors
+
+        goals = self.build_goals(valid_items, errors)
+        errors = [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
+        if errors and (self.is_atomic() or not goals):
+            return Response({'created': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            goals = Goal.objects.bulk_create(goals)
+            delta = GoalCounterDelta()
+            for goal in goals:
+                delta.add(goal.get_counter_state())
+            delta.save()
+            bump_board_versions(*self.boards_by_category.values())
+
+        return Response(
+            {'created': GoalSerializer(goals, many=True).data, 'errors': errors},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def build_goals(self, valid_items: list[tuple[int, dict]], errors: dict) -> list[Goal]:
+        """Функция проверяет категории и права на доски и собирает цели для вставки"""
+
+        category_ids = {data['category'] for _, data in valid_items}
+        self.boards_by_category = boards_by_category = dict(
+            GoalCategory.objects.filter(id__in=category_ids, is_deleted=False).values_list('id', 'board_id')
+        )
+        board_roles = get_board_roles(self.request)
+
+        goals = []
+        for index, data in valid_items:
+            category_id = data.pop('category')
+            board_id = boards_by_category.get(category_id)
+            if board_id is None:
+                errors[index] = {'category': [f'Invalid pk "{category_id}" - object does not exist.']}
+            elif board_roles.get(board_id) not in WRITE_ROLES:
+                errors[index] = {'category': ['You do not have permission to perform this action.']}
+            else:
+                goals.append(Goal(user=self.request.user, category_id=category_id, board_id=board_id, **data))
+        return goals
+
+    def is_atomic(self) -> bool:
+        return self.request.query_params.get('atomic', '').lower() in ('1', 'true')
+
+
+class GoalBulkUpdateView(generics.GenericAPIView):
+    """
+    Вью массового изменения статуса, приоритета, срока и категории целей.
+    Права проверяются одним запросом на весь список (как у GoalView: участник доски
+    с правом записи и автор цели), изменения применяются одним UPDATE
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GoalBulkUpdateSerializer
+
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        ids = set(changes.pop('ids'))
+
+        with transaction.atomic():
+            writable = {
+                goal_id: state for goal_id, *state in
+                self.get_writable_queryset(ids).values_list('id', *Goal.counter_fields)
+            }
+            writable_ids = set(writable)
+            if writable_ids:
+                board_ids = {board_id for board_id, *_ in writable.values()}
+                now = timezone.now()
+                if 'category' in changes:
+                    # update() минует Goal.save, доску целей и их комментариев переносим сами
+                    changes['board_id'] = changes['category'].board_id
+                    board_ids.add(changes['board_id'])
+                    GoalComment.objects.filter(goal_id__in=writable_ids).exclude(
+                        board_id=changes['board_id']
+                    ).update(board_id=changes['board_id'], updated=now)
+                    Tombstone.objects.bulk_create(
+                        Tombstone(kind=Tombstone.Kind.goals, object_id=goal_id, board_id=board_id)
+                        for goal_id, (board_id, *_) in writable.items() if board_id != changes['board_id']
+                    )
+                Goal.objects.filter(id__in=writable_ids).update(updated=now, **changes)
+                self.update_counters(writable.values(), changes)
+                bump_board_versions(*board_ids)
+
+        return Response({'updated': sorted(writable_ids), 'not_writable': sorted(ids - writable_ids)})
+
+    @staticmethod
+    def update_counters(states, changes: dict):
+        """Функция переносит цели в счетчиках досок из прежних состояний в измененные"""
+
+        delta = GoalCounterDelta()
+        for state in states:
+            delta.add(tuple(state), -1)
+            delta.add(tuple(changes.get(field, value) for field, value in zip(Goal.counter_fields, state)))
+        delta.save()
+
+    def get_writable_queryset(self, ids: set[int]):
+        """Цели, доступные для изменения. Строки целей блокируются, счетчики меняются от их текущего состояния"""
+
+        return Goal.objects.select_for_update(of=('self',)).filter(
+            Q(id__in=ids) & Q(user_id=self.request.user.id) & ~Q(status=Goal.Status.archived) &
+            Q(category__is_deleted=False) &
+            Q(board__participants__user_id=self.request.user.id) &
+            Q(board__participants__role__in=WRITE_ROLES)
+        )
+
+
+class GoalListView(ConditionalGetMixin, generics.ListAPIView):
     """Вью отображения списка целей"""
 
     model = Goal
     permission_classes = [GoalPermissions]
-    serializer_class = GoalSerializer
+    serializer_class = GoalListSerializer
+    pagination_class = LimitOffsetOrKeysetPagination
     filterset_class = GoalDateFilter
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, GoalFullTextSearchFilter]
     ordering_fields = ['title', 'created']
     ordering = ['title']
     search_fields = ['title', 'description']
 
     def get_queryset(self):
         return Goal.objects.filter(
-            Q(category__board__participants__user_id=self.request.user.id) & ~Q(status=Goal.Status.archived) & Q(
-                category__is_deleted=False)
+            Q(board__participants__user_id=self.request.user.id) & ~Q(status=Goal.Status.archived) &
+            Q(category__is_deleted=False)
         )
 
+    def get_etag_parts(self) -> tuple:
+        # Любое изменение цели меняет версию ее доски (goals.signals, массовые вью), поэтому ETag
+        # берется из версий досок пользователя в кэше: поиск и страницы курсора не читают все цели
+        return tuple(sorted(get_board_versions(get_board_roles(self.request)).items()))
+
 
 class GoalView(generics.RetrieveUpdateAPIView):
     """Вью отображения, редактирования и удаления цели"""
@@ -102,6 +257,9 @@ class GoalCommentCreateView(generics.CreateAPIView):
     serializer_class = GoalCommentCreateSerializer
     permission_classes = [CommentsPermissions]
 
+    def perform_create(self, serializer):
+        notify_goal_comment(serializer.save())
+
 
 class GoalCommentListView(generics.ListAPIView):
     """Вью отображения списка комментариев"""
@@ -109,13 +267,14 @@ class GoalCommentListView(generics.ListAPIView):
     model = GoalComment
     permission_classes = [CommentsPermissions]
     serializer_class = GoalCommentSerializer
+    pagination_class = LimitOffsetOrKeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['goal']
     ordering = ['-created']
 
     def get_queryset(self):
         return GoalComment.objects.filter(
-            goal__category__board__participants__user_id=self.request.user.id,
+            board__participants__user_id=self.request.user.id,
         )
 
 
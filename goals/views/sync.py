@@ -0,0 +1,183 @@
+import base64
+import binascii
+import datetime
+import json
+from operator import itemgetter
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied
+from rest_framework.response import Response
+
+from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment, Tombstone
+from goals.roles import get_board_roles
+from goals.serializers import (
+    BoardListSerializer, BoardParticipantSerializer, GoalCategorySerializer, GoalCommentSerializer, GoalSerializer,
+)
+
+
+class SyncStream(NamedTuple):
+    """Поток изменений одного типа объектов. is_deleted - объект отдается в 'deleted' вместо данных"""
+
+    name: str
+    queryset: QuerySet
+    serializer_class: type | None = None
+    is_deleted: Callable = lambda obj: False
+
+
+class FullResyncRequired(APIException):
+    """Курсор старше срока хранения записей об удалениях: клиент загружает данные заново без since"""
+
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Cursor is too old, full resync required'
+    default_code = 'full_resync_required'
+
+
+class SyncView(generics.GenericAPIView):
+    """
+    Вью синхронизации для офлайн-клиентов. Отдает доски, участников, категории, цели и
+    комментарии, измененные после курсора since, в порядке (updated, id). Удаленные доски
+    и категории, архивные цели и удаленные комментарии и участники попадают в 'deleted'.
+    Каждый поток читается по индексу (board, updated, id) от позиции курсора, поэтому
+    стоимость запроса зависит от числа изменений, а не от размера аккаунта.
+
+    updated ставится при сохранении, а не при коммите, поэтому изменение транзакции, которая
+    еще идет, после коммита оказалось бы позади курсора клиента. Отдаются только изменения
+    старше начала самой старой пишущей транзакции в PostgreSQL (pg_stat_activity) за вычетом
+    settle_seconds - запаса на расхождение часов приложения и БД. На других БД длинных
+    транзакций не отслеживаем, и граница - только settle_seconds. Записи об удалениях
+    хранятся tombstone_days (команда prune_tombstones), на курсор старше отвечаем 410
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+    max_limit = 1000
+    settle_seconds = settings.GOALS_SYNC_SETTLE_SECONDS
+    tombstone_days = settings.GOALS_SYNC_TOMBSTONE_DAYS
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get(self, request, *args, **kwargs):
+        cursor = self.decode_cursor(request.query_params.get('since'))
+        if cursor and cursor['updated'] < timezone.now() - datetime.timedelta(days=self.tombstone_days):
+            raise FullResyncRequired
+        limit = self.get_limit(request)
+        until = self.get_until()
+        streams = self.get_streams(self.get_board_ids(request))
+
+        rows = []
+        for order, stream in enumerate(streams):
+            queryset = stream.queryset.filter(updated__lte=until)
+            if cursor:
+                queryset = queryset.filter(self.after_cursor(cursor, order))
+            rows += [(obj.updated, order, obj.id, obj) for obj in queryset.order_by('updated', 'id')[:limit + 1]]
+        rows.sort(key=itemgetter(0, 1, 2))
+        page = rows[:limit]
+
+        data = {stream.name: [] for stream in streams[:-1]}
+        deleted = {stream.name: [] for stream in streams[:-1]}
+        joined_boards = []
+        for stream_order, stream in enumerate(streams):
+            objects = [obj for _, order, _, obj in page if order == stream_order]
+            if stream.queryset.model is Tombstone:
+                for tombstone in objects:
+                    deleted[tombstone.kind].append(tombstone.object_id)
+                continue
+
+            deleted[stream.name] += [obj.id for obj in objects if stream.is_deleted(obj)]
+            live = [obj for obj in objects if not stream.is_deleted(obj)]
+            data[stream.name] = stream.serializer_class(live, many=True, context=self.get_serializer_context()).data
+            if stream.queryset.model is BoardParticipant and cursor:
+                # Данные досок, в которые пользователя добавили после курсора, старше курсора:
+                # клиент загружает такие доски целиком через ?board=<id> без since
+                joined_boards += [obj.board_id for obj in live if obj.user_id == request.user.id
+                                  and obj.created > cursor['updated']]
+
+        next_cursor = self.encode_cursor(*page[-1][:3]) if page else request.query_params.get('since')
+        return Response({
+            'cursor': next_cursor,
+            'has_more': len(rows) > limit,
+            **data,
+            'deleted': deleted,
+            'joined_boards': joined_boards,
+        })
+
+    def get_until(self) -> datetime.datetime:
+        """Граница изменений, которые уже не могут появиться позади курсора"""
+
+        until = timezone.now()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # backend_xid есть только у транзакций, которые уже что-то записали
+                cursor.execute(
+                    'SELECT min(xact_start) FROM pg_stat_activity '
+                    'WHERE backend_xid IS NOT NULL AND datname = current_database()'
+                )
+                if (oldest := cursor.fetchone()[0]) is not None:
+                    until = min(until, oldest)
+        return until - datetime.timedelta(seconds=self.settle_seconds)
+
+    def get_board_ids(self, request) -> list[int]:
+        board_ids = list(get_board_roles(request))
+        if (board := request.query_params.get('board')) is not None:
+            if not board.isdigit() or int(board) not in board_ids:
+                raise PermissionDenied
+            board_ids = [int(board)]
+        return board_ids
+
+    def get_streams(self, board_ids: list[int]) -> list[SyncStream]:
+        """Потоки в порядке сортировки изменений с одинаковым updated. Записи Tombstone - последний поток"""
+
+        return [
+            SyncStream('boards', Board.objects.filter(id__in=board_ids), BoardListSerializer,
+                       lambda board: board.is_deleted),
+            SyncStream('participants', BoardParticipant.objects.filter(board_id__in=board_ids).select_related('user'),
+                       BoardParticipantSerializer),
+            SyncStream('categories', GoalCategory.objects.filter(board_id__in=board_ids).select_related('user'),
+                       GoalCategorySerializer, lambda category: category.is_deleted),
+            SyncStream('goals', Goal.objects.filter(board_id__in=board_ids), GoalSerializer,
+                       lambda goal: goal.status == Goal.Status.archived),
+            SyncStream('comments', GoalComment.objects.filter(board_id__in=board_ids).select_related('user'),
+                       GoalCommentSerializer),
+            SyncStream('tombstones', Tombstone.objects.filter(
+                Q(board_id__in=board_ids) | Q(user_id=self.request.user.id, kind=Tombstone.Kind.participants)
+            )),
+        ]
+
+    @staticmethod
+    def after_cursor(cursor: dict, order: int) -> Q:
+        """Условие 'позже курсора' для потока order при сортировке (updated, поток, id)"""
+
+        if order < cursor['stream']:
+            return Q(updated__gt=cursor['updated'])
+        if order > cursor['stream']:
+            return Q(updated__gte=cursor['updated'])
+        return Q(updated__gt=cursor['updated']) | Q(updated=cursor['updated'], id__gt=cursor['id'])
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    @staticmethod
+    def encode_cursor(updated: datetime.datetime, order: int, obj_id: int) -> str:
+        raw = json.dumps({'u': updated.isoformat(), 's': order, 'id': obj_id}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, token: str | None) -> dict | None:
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            updated = parse_datetime(cursor['u'])
+            if updated is None or timezone.is_naive(updated) or not isinstance(cursor['s'], int) or not isinstance(cursor['id'], int):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, AttributeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return {'updated': updated, 'stream': cursor['s'], 'id': cursor['id']}
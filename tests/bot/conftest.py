@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from bot.cache import tg_user_cache
+from bot.management.commands.runbot import Command
+from bot.tg.dc import MessageInfo
+
+
+class FakeSender:
+    """Отправитель, который запоминает сообщения вместо отправки в Telegram"""
+
+    def __init__(self):
+        self.messages: list[tuple[str, str]] = []
+        self.reply_markups: list[dict | None] = []
+        self.answered: list[str] = []
+
+    def send_message(self, chat_id: str, text: str | None, reply_markup: dict | None = None):
+        if text:
+            self.messages.append((str(chat_id), text))
+            self.reply_markups.append(reply_markup)
+
+    def edit_message(self, chat_id: str, message_id: int, text: str, reply_markup: dict | None = None):
+        self.send_message(chat_id, text, reply_markup)
+
+    def answer_callback_query(self, chat_id: str, callback_query_id: str):
+        self.answered.append(callback_query_id)
+
+    def texts(self, chat_id: str) -> list[str]:
+        return [text for message_chat_id, text in self.messages if message_chat_id == str(chat_id)]
+
+
+@pytest.fixture(autouse=True)
+def _clear_tg_user_cache():
+    yield
+    tg_user_cache.local.clear()
+
+
+@pytest.fixture()
+def bot_command(settings) -> Command:
+    settings.BOT_STATE_STORE = 'memory'
+    command = Command()
+    command.sender = FakeSender()
+    return command
+
+
+@pytest.fixture()
+def make_update():
+    update_ids = iter(range(1, 10_000))
+
+    def _make_update(chat_id: str, text: str) -> MessageInfo:
+        update_id = next(update_ids)
+        return MessageInfo(update_id=update_id, message={
+            'message_id': update_id,
+            'from': {'id': int(chat_id), 'is_bot': False, 'username': f'user{chat_id}'},
+            'chat': {'id': chat_id, 'first_name': 'Test', 'type': 'private'},
+            'date': datetime.now(),
+            'text': text,
+        })
+
+    return _make_update
+
+
+@pytest.fixture()
+def make_callback(make_update):
+
+    def _make_callback(chat_id: str, data: str) -> MessageInfo:
+        update = make_update(chat_id, 'keyboard')
+        return MessageInfo(update_id=update.update_id, callback_query={
+            'id': str(update.update_id),
+            'from': update.message.from_,
+            'message': update.message,
+            'data': data,
+        })
+
+    return _make_callback
@@ -0,0 +1,99 @@
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from bot.jobs import send_message
+from bot.tg.client import NotSentError, TgClient, TgError
+from core.jobs import run_job
+
+
+class TestTgClientRetries:
+    """Тест повторов запросов к Bot API"""
+
+    @pytest.fixture()
+    def tg_client(self, monkeypatch) -> TgClient:
+        monkeypatch.setattr('bot.tg.client.time.sleep', lambda seconds: None)
+        return TgClient('token', api_url='http://telegram.invalid')
+
+    @staticmethod
+    def make_response(status_code: int, data: dict) -> Mock:
+        return Mock(status_code=status_code, json=Mock(return_value=data))
+
+    def test_send_message_not_retried_after_read_timeout(self, tg_client):
+        """Проверка, что sendMessage не повторяется, если запрос мог дойти до Telegram"""
+
+        tg_client.session.post = Mock(side_effect=requests.ReadTimeout)
+        assert tg_client.send_message(chat_id='1', text='text') is None
+        assert tg_client.session.post.call_count == 1
+
+    def test_send_message_not_retried_after_server_error(self, tg_client):
+        tg_client.session.post = Mock(return_value=self.make_response(502, {'ok': False}))
+        assert tg_client.send_message(chat_id='1', text='text') is None
+        assert tg_client.session.post.call_count == 1
+
+    def test_send_message_retried_after_too_many_requests(self, tg_client):
+        """Проверка, что на 429 и ошибку соединения sendMessage повторяется"""
+
+        tg_client.session.post = Mock(side_effect=[
+            requests.ConnectTimeout(),
+            self.make_response(429, {'ok': False, 'parameters': {'retry_after': 1}}),
+            self.make_response(200, {'ok': True, 'result': {
+                'message_id': 1, 'from': None, 'chat': {'id': '1', 'first_name': 'user', 'type': 'private'},
+                'date': 0, 'text': 'text',
+            }}),
+        ])
+        assert tg_client.send_message(chat_id='1', text='text').ok is True
+        assert tg_client.session.post.call_count == 3
+
+    def test_get_updates_retried_after_read_timeout(self, tg_client):
+        tg_client.session.post = Mock(side_effect=[
+            requests.ReadTimeout(), self.make_response(500, {'ok': False}),
+            self.make_response(200, {'ok': True, 'result': []}),
+        ])
+        assert tg_client.get_updates(timeout=0).result == []
+        assert tg_client.session.post.call_count == 3
+
+    def test_not_sent_error(self, monkeypatch):
+        """Проверка, что с raise_not_sent запрос, который точно не дошел, поднимает NotSentError"""
+
+        monkeypatch.setattr('bot.tg.client.time.sleep', lambda seconds: None)
+        tg_client = TgClient('token', api_url='http://telegram.invalid', raise_not_sent=True)
+        tg_client.session.post = Mock(side_effect=requests.ConnectTimeout)
+        with pytest.raises(NotSentError):
+            tg_client.send_message(chat_id='1', text='text')
+        assert tg_client.session.post.call_count == tg_client.max_retries + 1
+
+    def test_error_response_raised(self):
+        """Проверка, что с raise_errors ответ Telegram с ok=false поднимает TgError с кодом и retry_after"""
+
+        tg_client = TgClient('token', api_url='http://telegram.invalid', raise_errors=True)
+        tg_client.session.post = Mock(return_value=self.make_response(502, {
+            'ok': False, 'error_code': 502, 'description': 'Bad Gateway', 'parameters': {'retry_after': 7},
+        }))
+        with pytest.raises(TgError) as error:
+            tg_client.send_message(chat_id='1', text='text')
+        assert (error.value.error.error_code, error.value.retry_after) == (502, 7)
+        assert tg_client.session.post.call_count == 1
+
+
+class TestSendMessageJob:
+    """Тест задачи отправки сообщения"""
+
+    @pytest.fixture()
+    def tg_client(self, monkeypatch) -> TgClient:
+        tg_client = TgClient('token', api_url='http://telegram.invalid', raise_not_sent=True, raise_errors=True)
+        monkeypatch.setattr('bot.jobs.get_tg_client', lambda: tg_client)
+        return tg_client
+
+    @pytest.mark.parametrize(('status_code', 'retried'), [(500, True), (403, False)])
+    def test_error_response(self, tg_client, job_queue, status_code, retried):
+        """Проверка, что на 5xx задача уходит на повтор, а на 4xx (бот заблокирован) не повторяется"""
+
+        tg_client.session.post = Mock(return_value=Mock(status_code=status_code, json=Mock(return_value={
+            'ok': False, 'error_code': status_code, 'description': 'error',
+        })))
+        run_job(job_queue, send_message._get_payload(('1', 'text'), {}))
+
+        assert bool(job_queue.delayed) is retried
+        assert not job_queue.dead
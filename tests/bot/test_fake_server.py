@@ -0,0 +1,36 @@
+import pytest
+
+from bot.tg.client import TgClient
+from bot.tg.fake_server import FakeBotApi, make_updates
+
+
+@pytest.fixture()
+def fake_api() -> FakeBotApi:
+    api = FakeBotApi().start()
+    yield api
+    api.stop()
+
+
+class TestFakeBotApi:
+    """Тест локальной замены Bot API"""
+
+    def test_get_updates_and_reply(self, fake_api):
+        tg_client = TgClient('token', api_url=fake_api.url)
+        pushed = [fake_api.push(update) for update in make_updates(3, chats=2)]
+
+        res = tg_client.get_updates(offset=0, timeout=0)
+        assert [item.update_id for item in res.result] == [update['update_id'] for update in pushed]
+        assert res.result[0].message.text == '/goals'
+
+        tg_client.send_message(chat_id='1', text='Цели не найдены')
+        assert fake_api.replies == [{'chat_id': '1', 'text': 'Цели не найдены', 'reply_markup': None}]
+        assert len(fake_api.latencies) == 2
+
+    def test_offset_confirms_updates(self, fake_api):
+        tg_client = TgClient('token', api_url=fake_api.url)
+        first, second = (fake_api.push(update) for update in make_updates(2, chats=1))
+
+        res = tg_client.get_updates(offset=second['update_id'], timeout=0)
+
+        assert [item.update_id for item in res.result] == [second['update_id']]
+        assert first not in fake_api.updates
@@ -0,0 +1,94 @@
+from unittest.mock import Mock
+
+import pytest
+
+from bot.pool import WorkerPoolRunner
+from bot.tg.sender import MessageSender
+from bot.updates import UpdateQueue
+
+
+@pytest.fixture()
+def pool(bot_command) -> WorkerPoolRunner:
+    return WorkerPoolRunner(bot_command, workers=4)
+
+
+class TestWorkerPoolRunner:
+
+    def test_chat_always_goes_to_same_worker(self, pool, make_update):
+        updates = [make_update(chat_id, 'hello') for chat_id in ('1', '2', '3', '1', '2', '1')]
+        for update in updates:
+            pool.dispatch(update)
+
+        for update in updates:
+            shard = pool.tasks[pool.get_shard(update.message.chat.id)]
+            assert shard.get(timeout=1).message.chat.id == update.message.chat.id
+
+    def test_slow_update_does_not_pin_offset(self, pool, bot_command, make_update):
+        """Проверка, что getUpdates запрашивается после розданных обновлений, а они сохраняются до обработки"""
+
+        first, second, third = (make_update(chat_id, 'hello') for chat_id in ('1', '2', '3'))
+        bot_command._fetch_updates = lambda: [first, second]
+        for update in pool._fetch_new_updates():
+            pool.dispatch(update)
+        assert [update.update_id for update in bot_command.update_log.get_pending()] == [first.update_id,
+                                                                                         second.update_id]
+
+        pool.complete(second.update_id)
+        bot_command._fetch_updates = lambda: [third]
+        assert pool._fetch_new_updates() == [third]
+        assert bot_command.offset == second.update_id + 1
+        assert [update.update_id for update in bot_command.update_log.get_pending()] == [first.update_id,
+                                                                                         third.update_id]
+
+    def test_pending_updates_dispatched_after_restart(self, bot_command, make_update, monkeypatch):
+        monkeypatch.setattr('bot.pool.signal.signal', lambda *args: None)
+        first, second = make_update('1', 'hello'), make_update('2', 'hello')
+        bot_command.update_log.add_pending([second, first])
+
+        pool = WorkerPoolRunner(bot_command, workers=2)
+        pool._start_workers = lambda: None
+        pool._fetch_new_updates = Mock(side_effect=KeyboardInterrupt)
+        pool.stop = lambda: None
+        with pytest.raises(KeyboardInterrupt):
+            pool.run()
+
+        assert pool.pending == {first.update_id, second.update_id}
+        assert pool.next_update_id == second.update_id + 1
+
+    def test_dispatched_updates_not_fetched_again(self, pool, bot_command, make_update):
+        first, second = make_update('1', 'hello'), make_update('2', 'hello')
+        pool.dispatch(first)
+        bot_command._fetch_updates = lambda: [first, second]
+
+        assert pool._fetch_new_updates() == [second]
+        assert bot_command.offset == first.update_id + 1
+
+    def test_queue_update_acked_after_processing(self, pool, bot_command, make_update):
+        """Проверка, что обновление из очереди webhook подтверждается, только когда воркер его обработал"""
+
+        bot_command.update_queue = Mock(spec=UpdateQueue)
+        update = make_update('1', 'hello')
+        pool.dispatch(update)
+        bot_command.update_queue.ack.assert_not_called()
+
+        pool.complete(update.update_id)
+        bot_command.update_queue.ack.assert_called_once_with(update.update_id)
+
+    def test_failed_update_stays_pending(self, pool, bot_command, make_update):
+        """Проверка, что необработанное обновление освобождает место в пуле, но остается в работе до перезапуска"""
+
+        update = make_update('1', 'hello')
+        bot_command._fetch_updates = lambda: [update]
+        for item in pool._fetch_new_updates():
+            pool.dispatch(item)
+
+        pool.complete(update.update_id, processed=False)
+        assert pool.pending == set()
+        assert bot_command.update_log.get_pending() == [update]
+
+    def test_workers_share_global_rate(self, bot_command, monkeypatch):
+        """Проверка, что воркеры пула делят общий лимит отправки Telegram"""
+
+        monkeypatch.setattr(WorkerPoolRunner, 'run', lambda self: None)
+        bot_command.handle(workers=3, from_queue=False, shard=0, use_async=False)
+        assert bot_command.sender.global_bucket.rate == MessageSender.global_rate / 3
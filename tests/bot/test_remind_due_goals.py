@@ -0,0 +1,54 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from bot.models import TgUser
+from goals.models import Goal
+
+
+@pytest.mark.django_db()
+class TestRemindDueGoals:
+    """Тест напоминаний о сроках целей"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, user, user_factory):  # noqa: PT004
+        self.today = timezone.localdate()
+        board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=board, user=user)
+        TgUser.objects.create(tg_id='100500', username='tg_user', user=user)
+        # Участник доски без привязанного бота напоминаний не получает
+        board.participants.create(user=user_factory.create(), role=2)
+
+    def run_command(self, django_capture_on_commit_callbacks, job_queue) -> list[dict]:
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('remind_due_goals')
+        return [payload['kwargs'] for payload in iter(lambda: job_queue.pop(timeout=0), None)]
+
+    def test_digest_per_user(self, goal_factory, django_capture_on_commit_callbacks, job_queue):
+        overdue = goal_factory.create(category=self.category, title='Overdue',
+                                      due_date=self.today - datetime.timedelta(days=2))
+        soon = goal_factory.create(category=self.category, title='Soon', due_date=self.today + datetime.timedelta(days=1))
+        goal_factory.create(category=self.category, due_date=self.today + datetime.timedelta(days=10))
+        goal_factory.create(category=self.category, due_date=self.today, status=Goal.Status.done)
+        goal_factory.create(category=self.category, due_date=None)
+
+        messages = self.run_command(django_capture_on_commit_callbacks, job_queue)
+
+        assert messages == [{
+            'chat_id': '100500',
+            'text': 'Сроки целей:\n'
+                    f'#{overdue.id} Overdue - до {overdue.due_date:%d.%m.%Y} (просрочена)\n'
+                    f'#{soon.id} Soon - до {soon.due_date:%d.%m.%Y}',
+        }]
+
+    def test_notified_goals_skipped(self, goal_factory, django_capture_on_commit_callbacks, job_queue):
+        goal = goal_factory.create(category=self.category, due_date=self.today)
+
+        assert len(self.run_command(django_capture_on_commit_callbacks, job_queue)) == 1
+        assert self.run_command(django_capture_on_commit_callbacks, job_queue) == []
+
+        goal.due_date = self.today + datetime.timedelta(days=1)
+        goal.save(update_fields=('due_date',))
+        assert len(self.run_command(django_capture_on_commit_callbacks, job_queue)) == 1
@@ -0,0 +1,180 @@
+from unittest.mock import Mock
+
+import pytest
+from django.urls import reverse
+
+from bot.models import TgUser
+from goals.models import Goal
+
+
+@pytest.mark.django_db()
+class TestRunBotDialog:
+    """Тест диалогов бота"""
+
+    chat_id = '100500'
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, user):  # noqa: PT004
+        self.user = user
+        self.board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=self.board, user=user, title='Work')
+
+    def link_user(self):
+        TgUser.objects.create(tg_id=self.chat_id, username=self.chat_id, user=self.user)
+
+    def test_unknown_user_gets_verification_code(self, bot_command, make_update):
+        """Проверка, что новый пользователь получает код верификации"""
+
+        bot_command._process_update(make_update(self.chat_id, 'hello'))
+
+        tg_user = TgUser.objects.get(tg_id=self.chat_id)
+        assert tg_user.user is None
+        assert tg_user.verification_code in bot_command.sender.texts(self.chat_id)[-1]
+
+    def test_verified_user_linked_without_db_read(self, bot_command, make_update, auth_client,
+                                                  django_capture_on_commit_callbacks, django_assert_num_queries):
+        """Проверка, что после привязки аккаунта бот берет привязанного пользователя из кэша"""
+
+        bot_command._process_update(make_update(self.chat_id, 'hello'))
+        code = TgUser.objects.get(tg_id=self.chat_id).verification_code
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.patch(reverse('bot_verify'), data={'verification_code': code})
+
+        with django_assert_num_queries(0):
+            tg_user = bot_command._check_user_existence(make_update(self.chat_id, '/goals').message.from_, self.chat_id)
+        assert tg_user.user_id == self.user.id
+
+    def test_create_goal(self, bot_command, make_update):
+        """Проверка диалога создания цели"""
+
+        self.link_user()
+        for text in ['/create', 'work', 'New goal']:
+            bot_command._process_update(make_update(self.chat_id, text))
+
+        assert bot_command.sender.texts(self.chat_id)[-1] == 'Цель создана'
+        goal = Goal.objects.get(title='New goal')
+        assert goal.category == self.category
+        assert goal.user == self.user
+        assert bot_command.dialog_states.get(self.chat_id) == {}
+
+    def test_cancel(self, bot_command, make_update):
+        """Проверка отмены диалога"""
+
+        self.link_user()
+        for text in ['/create', '/cancel', 'work']:
+            bot_command._process_update(make_update(self.chat_id, text))
+
+        assert bot_command.sender.texts(self.chat_id)[-2:] == ['Отмена', 'неизвестная команда']
+        assert not Goal.objects.exists()
+
+    def test_wrong_category_name_can_be_retried(self, bot_command, make_update):
+        """Проверка повторного ввода категории после ошибки"""
+
+        self.link_user()
+        for text in ['/create', 'unknown', 'work', 'New goal']:
+            bot_command._process_update(make_update(self.chat_id, text))
+
+        assert 'Не верное имя категории попробуйте еще раз' in bot_command.sender.texts(self.chat_id)
+        assert Goal.objects.get().category == self.category
+
+    def test_redelivered_update_is_skipped(self, bot_command, make_update):
+        """Проверка, что повторно доставленное обновление не создает цель второй раз"""
+
+        self.link_user()
+        updates = [make_update(self.chat_id, text) for text in ['/create', 'work', 'New goal']]
+        for update in updates:
+            bot_command._process_update(update)
+        bot_command.dialog_states.set(self.chat_id, step='set_name_goal', category_id=self.category.id)
+        bot_command._process_update(updates[-1])
+
+        assert Goal.objects.filter(title='New goal').count() == 1
+
+    def test_failed_update_processed_again(self, bot_command, make_update, monkeypatch):
+        """Проверка, что обновление, обработка которого упала, не отмечается обработанным"""
+
+        self.link_user()
+        update = make_update(self.chat_id, '/goals')
+        monkeypatch.setattr(bot_command, '_get_message_authorized_users', Mock(side_effect=RuntimeError))
+        with pytest.raises(RuntimeError):
+            bot_command._process_update(update)
+
+        monkeypatch.undo()
+        bot_command._process_update(update)
+        assert bot_command.sender.texts(self.chat_id)
+        bot_command._process_update(update)
+        assert len(bot_command.sender.texts(self.chat_id)) == 1
+
+
+class TestRunBotOffset:
+    """Тест сохранения offset между перезапусками бота"""
+
+    def test_offset_committed_in_batches(self, bot_command):
+        bot_command.commit_every, bot_command.commit_interval = 10, 60
+        bot_command.offset = 5
+        bot_command._commit_offset()
+        assert bot_command.update_log.get_offset() == 5
+
+        bot_command.offset = 9
+        bot_command._commit_offset()
+        assert bot_command.update_log.get_offset() == 5
+
+        bot_command.offset = 15
+        bot_command._commit_offset()
+        assert bot_command.update_log.get_offset() == 15
+
+    def test_claims_released_on_restart(self, bot_command):
+        """Проверка, что обновление, взятое в работу упавшим процессом, после перезапуска обрабатывается"""
+
+        update_log = bot_command.update_log
+        assert update_log.claim(1) is True
+        assert update_log.claim(1) is False
+        update_log.release_claims()
+        assert update_log.claim(1) is True
+
+        update_log.done(1)
+        update_log.release_claims()
+        assert update_log.claim(1) is False
+
+
+@pytest.mark.django_db()
+class TestRunBotGoalsPages:
+    """Тест листания списка целей"""
+
+    chat_id = '100501'
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, goal_factory, user):  # noqa: PT004
+        board = board_factory.create(with_owner=user)
+        category = goal_category_factory.create(board=board, user=user)
+        self.goals = goal_factory.create_batch(200, category=category, user=user, title='g' * 50)
+        TgUser.objects.create(tg_id=self.chat_id, username=self.chat_id, user=user)
+
+    @staticmethod
+    def get_buttons(reply_markup: dict | None) -> dict[str, str]:
+        if not reply_markup:
+            return {}
+        return {button['text']: button['callback_data'] for button in reply_markup['inline_keyboard'][0]}
+
+    def test_first_page_fits_message(self, bot_command, make_update):
+        bot_command._process_update(make_update(self.chat_id, '/goals'))
+
+        text = bot_command.sender.texts(self.chat_id)[-1]
+        assert len(text) <= 4096
+        assert text.startswith(f'#{self.goals[0].id} ')
+        assert list(self.get_buttons(bot_command.sender.reply_markups[-1])) == ['Далее »']
+
+    def test_pages_cover_all_goals(self, bot_command, make_update, make_callback):
+        bot_command._process_update(make_update(self.chat_id, '/goals'))
+        pages = [bot_command.sender.texts(self.chat_id)[-1]]
+        while next_data := self.get_buttons(bot_command.sender.reply_markups[-1]).get('Далее »'):
+            bot_command._process_update(make_callback(self.chat_id, next_data))
+            pages.append(bot_command.sender.texts(self.chat_id)[-1])
+
+        lines = '\n'.join(pages).split('\n')
+        assert lines == [f'#{goal.id} {goal.title}' for goal in self.goals]
+        assert len(pages) > 1
+
+        bot_command._process_update(make_callback(self.chat_id, self.get_buttons(
+            bot_command.sender.reply_markups[-1])['« Назад']))
+        assert bot_command.sender.texts(self.chat_id)[-1] == pages[-2]
+        assert len(bot_command.sender.answered) == len(pages)
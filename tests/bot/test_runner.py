@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from bot.runner import AsyncBotRunner
+
+
+@pytest.mark.django_db()
+class TestAsyncBotRunner:
+    """Тест asyncio-движка бота"""
+
+    def test_updates_kept_until_processed(self, bot_command, make_update):
+        """Проверка, что полученные обновления хранятся в работе, пока чат-воркер их не обработает"""
+
+        first, second = make_update('1', 'hello'), make_update('2', 'hello')
+        bot_command._fetch_updates = lambda: [first, second]
+        bot_command._process_update = Mock()
+        runner = AsyncBotRunner(bot_command)
+
+        assert runner._fetch_updates() == [first, second]
+        assert bot_command.update_log.get_pending() == [first, second]
+
+        runner._process_update(first)
+        assert bot_command.update_log.get_pending() == [second]
+
+    def test_failed_update_kept_pending(self, bot_command, make_update):
+        """Проверка, что обновление с ошибкой повторяется update_attempts раз и остается в работе до перезапуска"""
+
+        update = make_update('1', 'hello')
+        bot_command.error_delay = 0
+        bot_command.update_log.add_pending([update])
+        bot_command._process_update = Mock(side_effect=[ValueError, ValueError, ValueError, None])
+
+        AsyncBotRunner(bot_command)._process_update(update)
+        assert bot_command._process_update.call_count == bot_command.update_attempts
+        assert bot_command.update_log.get_pending() == [update]
+
+        AsyncBotRunner(bot_command)._process_update(update)
+        assert bot_command.update_log.get_pending() == []
+
+    def test_pending_updates_dispatched_on_start(self, bot_command, make_update):
+        update = make_update('1', 'hello')
+        bot_command.update_log.add_pending([update])
+        bot_command._fetch_updates = Mock(side_effect=KeyboardInterrupt)
+        bot_command._process_update = Mock()
+
+        async def run():
+            runner = AsyncBotRunner(bot_command)
+            try:
+                await runner.run()
+            except KeyboardInterrupt:
+                await asyncio.gather(*runner.workers)
+
+        asyncio.run(run())
+
+        bot_command._process_update.assert_called_once_with(update)
+        assert bot_command.update_log.get_pending() == []
+
+    def test_fetch_waits_for_capacity(self, bot_command, make_update):
+        """Проверка, что при max_in_flight обновлениях в работе новые обновления не запрашиваются"""
+
+        fetched = []
+        release = threading.Event()
+
+        def fetch_updates():
+            fetched.append(len(fetched))
+            return [make_update(str(len(fetched) * 10 + index), 'hello') for index in range(2)]
+
+        bot_command._fetch_updates = fetch_updates
+        bot_command._process_update = Mock(side_effect=lambda item: release.wait(5))
+
+        async def run():
+            runner = AsyncBotRunner(bot_command)
+            runner.max_in_flight = 2
+            task = asyncio.create_task(runner.run())
+            await asyncio.sleep(0.2)
+            assert len(fetched) == 1
+
+            release.set()
+            while len(fetched) < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, *runner.workers, return_exceptions=True)
+
+        asyncio.run(run())
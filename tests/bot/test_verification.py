@@ -0,0 +1,25 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from bot.models import TgUser
+
+
+@pytest.mark.django_db()
+class TestVerificationCodeView:
+    """Тест привязки аккаунта к боту"""
+
+    url = reverse('bot_verify')
+
+    def test_notification_enqueued_after_commit(self, auth_client, user, django_capture_on_commit_callbacks,
+                                                job_queue):
+        TgUser.objects.create(tg_id='100500', username='tg_user', verification_code='code')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_client.patch(self.url, data={'verification_code': 'code'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert TgUser.objects.get(tg_id='100500').user == user
+        payload = job_queue.pop(timeout=0)
+        assert payload['name'] == 'bot.jobs.send_message'
+        assert payload['kwargs'] == {'chat_id': '100500', 'text': 'Аккаунт привязан успешно'}
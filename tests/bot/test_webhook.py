@@ -0,0 +1,54 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from bot.updates import memory_update_queue
+
+
+@pytest.fixture()
+def update_queue(settings):
+    settings.BOT_UPDATE_QUEUE = 'memory'
+    settings.BOT_WEBHOOK_SECRET = 'secret'
+    yield memory_update_queue
+    memory_update_queue.pop_many(limit=10_000, timeout=0)
+
+
+@pytest.fixture()
+def payload() -> dict:
+    return {
+        'update_id': 10,
+        'message': {
+            'message_id': 1,
+            'from': {'id': 42, 'is_bot': False, 'username': 'user42'},
+            'chat': {'id': '42', 'first_name': 'Test', 'type': 'private'},
+            'date': 1672531200,
+            'text': '/goals',
+        },
+    }
+
+
+class TestTelegramWebhook:
+    url = reverse('bot_webhook')
+
+    def test_wrong_secret(self, client, update_queue, payload):
+        response = client.post(self.url, data=payload, format='json',
+                               HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='wrong')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert update_queue.pop_many(timeout=0) == []
+
+    def test_update_enqueued(self, client, update_queue, payload):
+        response = client.post(self.url, data=payload, format='json',
+                               HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret')
+
+        assert response.status_code == status.HTTP_200_OK
+        updates = update_queue.pop_many(timeout=0)
+        assert [(update.update_id, update.message.text) for update in updates] == [(10, '/goals')]
+
+    def test_unsupported_update_skipped(self, client, update_queue):
+        response = client.post(self.url, data={'update_id': 11, 'edited_message': {}},
+                               format='json',
+                               HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='secret')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert update_queue.pop_many(timeout=0) == []
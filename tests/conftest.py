@@ -1,9 +1,28 @@
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
+from core.jobs import memory_job_queue
+
 pytest_plugins = 'tests.factories'
 
 
+@pytest.fixture(autouse=True)
+def _locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def job_queue(settings):
+    settings.JOB_QUEUE = 'memory'
+    yield memory_job_queue
+    memory_job_queue.queue.clear()
+    memory_job_queue.delayed.clear()
+    memory_job_queue.dead.clear()
+
+
 @pytest.fixture()
 def client() -> APIClient:
     return APIClient()
@@ -0,0 +1,67 @@
+import pytest
+
+from django.core.exceptions import ImproperlyConfigured
+
+from core.jobs import JobError, get_job_queue, job, run_pending
+
+calls: list[str] = []
+
+
+@job(max_retries=2, retry_delay=0)
+def flaky_job(text: str):
+    calls.append(text)
+    if text == 'fail':
+        raise JobError(text)
+
+
+@pytest.fixture(autouse=True)
+def _clear_calls():
+    yield
+    calls.clear()
+
+
+@pytest.mark.django_db()
+class TestJobs:
+    """Тест фоновых задач"""
+
+    def test_job_enqueued_on_commit(self, django_capture_on_commit_callbacks, job_queue):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            flaky_job.delay('hello')
+        assert not job_queue.queue
+
+        for callback in callbacks:
+            callback()
+        assert run_pending() == 1
+        assert calls == ['hello']
+
+    def test_failed_job_retried_then_buried(self, django_capture_on_commit_callbacks, job_queue):
+        with django_capture_on_commit_callbacks(execute=True):
+            flaky_job.delay('fail')
+
+        for _ in range(3):
+            run_pending()
+
+        assert calls == ['fail'] * 3
+        assert not job_queue.delayed
+        assert [(payload['attempt'], payload['error']) for payload in job_queue.dead] == [
+            (3, "JobError('fail')")
+        ]
+
+    def test_unknown_queue_backend(self, settings):
+        settings.JOB_QUEUE = 'rabbitmq'
+        with pytest.raises(ImproperlyConfigured):
+            get_job_queue()
+
+    def test_job_acked_after_run(self, django_capture_on_commit_callbacks, job_queue, monkeypatch):
+        """Проверка, что задача подтверждается в очереди только после выполнения или повтора"""
+
+        acked = []
+        monkeypatch.setattr(job_queue, 'ack', lambda payload: acked.append((payload['id'], list(calls))))
+        with django_capture_on_commit_callbacks(execute=True):
+            flaky_job.delay('hello')
+            flaky_job.delay('fail')
+
+        run_pending()
+        assert calls == ['hello', 'fail', 'fail', 'fail']
+        # Каждая попытка подтверждается сразу после выполнения, в том числе упавшая
+        assert [run_calls for _, run_calls in acked] == [calls[:count] for count in range(1, 5)]
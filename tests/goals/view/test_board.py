@@ -35,6 +35,24 @@ class TestRetrieveBoardView(BaseTestCase):
         response = client.get(self.url)
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_not_modified(self, auth_client, another_user):
+        """Проверка условного GET: новый участник меняет ETag доски"""
+
+        etag = auth_client.get(self.url)['ETag']
+        assert auth_client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        self.board.participants.create(user=another_user, role=BoardParticipant.Role.reader)
+        assert auth_client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_not_modified_requires_access(self, client, user, another_user):
+        """Проверка, что ETag не дает обойти права доступа"""
+
+        client.force_login(user)
+        etag = client.get(self.url)['ETag']
+
+        client.force_login(another_user)
+        assert client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_403_FORBIDDEN
+
     def test_success(self, auth_client, user):
         response = auth_client.get(self.url)
         assert response.status_code == status.HTTP_200_OK
@@ -103,6 +121,17 @@ class TestDestroyBoardView(BaseTestCase):
         response = auth_client.delete(self.url)
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_cached_role_reset_after_role_change(self, auth_client):
+        """Проверка сброса закэшированной роли после её изменения"""
+
+        assert auth_client.get(self.url).status_code == status.HTTP_200_OK
+
+        self.participant.role = BoardParticipant.Role.reader
+        self.participant.save(update_fields=('role',))
+
+        response = auth_client.delete(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
     def test_success(self, auth_client):
         assert self.participant.role == BoardParticipant.Role.owner
 
@@ -259,3 +288,35 @@ class TestUpdateBoardView(BaseTestCase):
 
         assert response.status_code == status.HTTP_200_OK
         assert BoardParticipant.objects.count() == 2
+
+    def test_unknown_participant_username(self, auth_client, faker):
+        """Проверка добавления несуществующего пользователя"""
+
+        response = auth_client.patch(self.url, {'participants': [
+            {'role': BoardParticipant.Role.writer, 'user': faker.user_name()}
+        ]})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert BoardParticipant.objects.count() == 1
+
+    def test_participants_sync_queries_do_not_depend_on_participants_count(
+            self, auth_client, user_factory, django_assert_max_num_queries
+    ):
+        """Проверка, что синхронизация участников выполняется постоянным числом запросов"""
+
+        users = user_factory.create_batch(size=30)
+        BoardParticipant.objects.bulk_create(
+            BoardParticipant(board=self.board, user=user, role=BoardParticipant.Role.writer) for user in users[:20]
+        )
+        participants = [
+            {'role': BoardParticipant.Role.reader, 'user': user.username} for user in users[10:]
+        ]
+
+        with django_assert_max_num_queries(20):
+            response = auth_client.patch(self.url, {'participants': participants})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(self.board.participants.values_list('user_id', 'role')) == {
+            (self.participant.user_id, BoardParticipant.Role.owner),
+            *((user.id, BoardParticipant.Role.reader) for user in users[10:]),
+        }
@@ -1,6 +1,9 @@
 import pytest
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.test import APIClient
+
+from goals.models import BoardParticipant
 
 from tests.utils import BaseTestCase
 
@@ -17,6 +20,61 @@ class TestBoardListView(BaseTestCase):
         response = client.get(self.url)
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_not_modified(self, auth_client, user, board_factory):
+        """Проверка условного GET: 304 без изменений, 200 после удаления доски"""
+
+        board_factory.create(with_owner=user)
+        deleted_board = board_factory.create(with_owner=user)
+        etag = auth_client.get(self.url)['ETag']
+
+        assert auth_client.get(self.url, HTTP_IF_NONE_MATCH=f'W/{etag}').status_code == status.HTTP_304_NOT_MODIFIED
+
+        deleted_board.is_deleted = True
+        deleted_board.save()
+        assert auth_client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_cached_response_reset_on_board_change(self, auth_client, user, board_factory,
+                                                   django_capture_on_commit_callbacks, django_assert_num_queries):
+        """Проверка, что ответ берется из кэша, а изменение доски сразу дает новый ответ"""
+
+        board = board_factory.create(with_owner=user, title='old')
+        auth_client.get(self.url)
+        # Сессия, пользователь и ETag, список досок берется из кэша
+        with django_assert_num_queries(3):
+            assert auth_client.get(self.url).json()[0]['title'] == 'old'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            board.title = 'new'
+            board.save()
+        assert auth_client.get(self.url).json()[0]['title'] == 'new'
+
+    @pytest.mark.parametrize('bulk', [False, True], ids=['goal', 'bulk_update'])
+    def test_moved_goal_changes_old_board(self, auth_client, user, user_factory, board_factory, goal_category_factory,
+                                          goal_factory, django_capture_on_commit_callbacks, bulk):
+        """Проверка, что перенос цели на другую доску меняет ETag и статистику у участника только прежней доски"""
+
+        owner = user_factory.create()
+        board = board_factory.create(with_owner=owner)
+        BoardParticipant.objects.create(board=board, user=user, role=BoardParticipant.Role.reader)
+        goal = goal_factory.create(category=goal_category_factory.create(board=board, user=owner), user=owner)
+        other_category = goal_category_factory.create(board=board_factory.create(with_owner=owner), user=owner)
+        response = auth_client.get(self.url, {'stats': 'true'})
+        assert response.json()[0]['stats']['total'] == 1
+
+        owner_client = APIClient()
+        owner_client.force_login(owner)
+        with django_capture_on_commit_callbacks(execute=True):
+            if bulk:
+                owner_client.patch(reverse('goals:bulk-update-goals'),
+                                   {'ids': [goal.id], 'category': other_category.id}, format='json')
+            else:
+                owner_client.patch(reverse('goals:retrieve-update-destroy-goal', args=[goal.id]),
+                                   {'category': other_category.id})
+
+        response = auth_client.get(self.url, {'stats': 'true'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]['stats']['total'] == 0
+
     def test_user_not_board_participant(self, auth_client, board, user, board_factory):
         """Проверка на нахождения в доске"""
 
@@ -0,0 +1,106 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from goals.models import BoardGoalCounter, Goal
+from tests.utils import BaseTestCase
+
+
+@pytest.mark.django_db()
+class TestBoardStatsView(BaseTestCase):
+    """Тест статистики доски"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, user):  # noqa: PT004
+        self.board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=self.board, user=user)
+        self.url = reverse('goals:board-stats', args=[self.board.id])
+
+    def test_auth_required(self, client):
+        """Проверка авторизации"""
+
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_user_not_board_participant(self, client, user_factory):
+        """Проверка, что статистику видят только участники доски"""
+
+        client.force_login(user_factory.create())
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_counters_follow_goals(self, auth_client, goal_factory, user, django_assert_num_queries):
+        """Проверка, что счетчики меняются при создании, изменении и архивации целей и читаются без таблицы целей"""
+
+        yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        goal_factory.create(category=self.category, user=user, due_date=yesterday)
+        goal_factory.create(category=self.category, user=user, priority=Goal.Priority.high)
+        done = goal_factory.create(category=self.category, user=user)
+        done.status = Goal.Status.done
+        done.save()
+        archived = goal_factory.create(category=self.category, user=user, due_date=yesterday)
+        archived.status = Goal.Status.archived
+        archived.save(update_fields=('status',))
+
+        # Сессия, пользователь, доска, роли и два запроса к счетчикам
+        with django_assert_num_queries(6):
+            response = auth_client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'total': 3,
+            'by_status': {'todo': 2, 'in_progress': 0, 'done': 1},
+            'by_priority': {'low': 2, 'medium': 0, 'high': 1, 'critical': 0},
+            'overdue': 1,
+        }
+
+    def test_stale_instances_do_not_double_count(self, auth_client, goal_factory, user):
+        """Проверка, что два сохранения одной цели, загруженной дважды, меняют счетчики один раз"""
+
+        goal = goal_factory.create(category=self.category, user=user)
+        first, second = Goal.objects.get(id=goal.id), Goal.objects.get(id=goal.id)
+        for instance in (first, second):
+            instance.status = Goal.Status.done
+            instance.save()
+
+        assert auth_client.get(self.url).json()['by_status'] == {'todo': 0, 'in_progress': 0, 'done': 1}
+        assert not BoardGoalCounter.objects.filter(count__lt=0).exists()
+
+    def test_bulk_update_and_category_delete(self, auth_client, goal_factory, user):
+        """Проверка счетчиков после массового изменения целей и удаления категории"""
+
+        goals = goal_factory.create_batch(size=3, category=self.category, user=user)
+        auth_client.patch(reverse('goals:bulk-update-goals'),
+                          {'ids': [goals[0].id], 'status': Goal.Status.in_progress}, format='json')
+        assert auth_client.get(self.url).json()['by_status'] == {'todo': 2, 'in_progress': 1, 'done': 0}
+
+        auth_client.delete(reverse('goals:retrieve-update-destroy-category', args=[self.category.id]))
+        assert auth_client.get(self.url).json()['total'] == 0
+
+    def test_board_list_with_stats(self, auth_client, goal_factory, user, django_capture_on_commit_callbacks):
+        """Проверка статистики в списке досок и ее обновления после изменения цели"""
+
+        url = reverse('goals:board-list')
+        assert 'stats' not in auth_client.get(url).json()[0]
+        assert auth_client.get(url, {'stats': 'true'}).json()[0]['stats']['total'] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            goal_factory.create(category=self.category, user=user)
+        assert auth_client.get(url, {'stats': 'true'}).json()[0]['stats']['total'] == 1
+
+    def test_recount_heals_drift(self, goal_factory, user):
+        """Проверка, что команда пересчета исправляет разошедшиеся счетчики"""
+
+        goal_factory.create_batch(size=2, category=self.category, user=user)
+        BoardGoalCounter.objects.filter(board=self.board).update(count=5)
+        BoardGoalCounter.objects.create(board=self.board, status=Goal.Status.done, priority=Goal.Priority.low, count=-1)
+
+        call_command('recount_board_stats', '--board', self.board.id)
+
+        assert list(BoardGoalCounter.objects.filter(board=self.board).values_list('status', 'priority', 'count')) == [
+            (Goal.Status.todo, Goal.Priority.low, 2)
+        ]
@@ -0,0 +1,140 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from tests.utils import BaseTestCase
+from goals.models import BoardParticipant, Goal
+
+
+@pytest.mark.django_db()
+class TestGoalBulkCreateView(BaseTestCase):
+    """Тест массового создания целей"""
+
+    url = reverse('goals:bulk-create-goals')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, user):  # noqa: PT004
+        self.board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=self.board, user=user)
+
+    def test_auth_required(self, client):
+        """Проверка авторизации"""
+
+        response = client.post(self.url, [])
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_list_required(self, auth_client):
+        """Проверка, что принимается только список"""
+
+        response = auth_client.post(self.url, {'title': 'goal', 'category': self.category.id})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_success(self, auth_client, user, django_assert_max_num_queries):
+        goals = [{'title': f'goal {i}', 'category': self.category.id} for i in range(20)]
+
+        # Вставка целей и одно обновление счетчиков доски на весь список
+        with django_assert_max_num_queries(8):
+            response = auth_client.post(self.url, goals)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()['errors'] == []
+        assert len(response.json()['created']) == 20
+        assert Goal.objects.filter(category=self.category, user=user).count() == 20
+
+    def test_invalid_items_reported(self, auth_client, goal_category_factory, board_factory, user):
+        """Проверка, что невалидные элементы возвращаются с индексом, а валидные создаются"""
+
+        reader_board = board_factory.create()
+        BoardParticipant.objects.create(board=reader_board, user=user, role=BoardParticipant.Role.reader)
+        reader_category = goal_category_factory.create(board=reader_board)
+        deleted_category = goal_category_factory.create(board=self.board, is_deleted=True)
+
+        response = auth_client.post(self.url, [
+            {'title': 'valid', 'category': self.category.id},
+            {'title': 'reader', 'category': reader_category.id},
+            {'title': 'deleted', 'category': deleted_category.id},
+            {'category': self.category.id},
+        ])
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [goal['title'] for goal in response.json()['created']] == ['valid']
+        assert [error['index'] for error in response.json()['errors']] == [1, 2, 3]
+        assert Goal.objects.count() == 1
+
+    def test_atomic_mode(self, auth_client):
+        """Проверка режима 'все или ничего'"""
+
+        response = auth_client.post(f'{self.url}?atomic=true', [
+            {'title': 'valid', 'category': self.category.id},
+            {'category': self.category.id},
+        ])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()['errors'][0]['index'] == 1
+        assert not Goal.objects.exists()
+
+
+@pytest.mark.django_db()
+class TestGoalBulkUpdateView(BaseTestCase):
+    """Тест массового изменения целей"""
+
+    url = reverse('goals:bulk-update-goals')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, goal_factory, user):  # noqa: PT004
+        self.board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=self.board, user=user)
+        self.goals = goal_factory.create_batch(size=3, category=self.category, user=user)
+
+    def test_auth_required(self, client):
+        """Проверка авторизации"""
+
+        response = client.patch(self.url, {'ids': [self.goals[0].id], 'status': Goal.Status.done})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_nothing_to_update(self, auth_client):
+        """Проверка, что нужно передать хотя бы одно поле"""
+
+        response = auth_client.patch(self.url, {'ids': [self.goals[0].id]})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_success(self, auth_client, django_assert_max_num_queries):
+        ids = [goal.id for goal in self.goals]
+
+        with django_assert_max_num_queries(7):
+            response = auth_client.patch(self.url, {'ids': ids, 'status': Goal.Status.done, 'priority': Goal.Priority.high})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {'updated': sorted(ids), 'not_writable': []}
+        assert set(Goal.objects.values_list('status', 'priority')) == {(Goal.Status.done, Goal.Priority.high)}
+
+    def test_not_writable_goals_reported(self, auth_client, board_factory, goal_category_factory, goal_factory, user):
+        """Проверка, что цели без права записи не меняются и возвращаются в 'not_writable'"""
+
+        reader_board = board_factory.create()
+        BoardParticipant.objects.create(board=reader_board, user=user, role=BoardParticipant.Role.reader)
+        reader_goal = goal_factory.create(category=goal_category_factory.create(board=reader_board), user=user)
+        foreign_goal = goal_factory.create()
+
+        ids = [self.goals[0].id, reader_goal.id, foreign_goal.id]
+        response = auth_client.patch(self.url, {'ids': ids, 'status': Goal.Status.done})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {'updated': [self.goals[0].id], 'not_writable': sorted([reader_goal.id, foreign_goal.id])}
+        reader_goal.refresh_from_db(fields=('status',))
+        assert reader_goal.status == Goal.Status.todo
+
+    def test_category_moves_board(self, auth_client, board_factory, goal_category_factory, goal_comment_factory, user):
+        """Проверка, что при переносе в категорию другой доски доска меняется у целей и их комментариев"""
+
+        other_board = board_factory.create(with_owner=user)
+        other_category = goal_category_factory.create(board=other_board, user=user)
+        comment = goal_comment_factory.create(goal=self.goals[0], user=user)
+        assert comment.board_id == self.board.id
+
+        response = auth_client.patch(self.url, {'ids': [self.goals[0].id], 'category': other_category.id})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Goal.objects.get(id=self.goals[0].id).board_id == other_board.id
+        comment.refresh_from_db(fields=('board',))
+        assert comment.board_id == other_board.id
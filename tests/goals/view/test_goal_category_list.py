@@ -0,0 +1,30 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from tests.utils import BaseTestCase
+
+
+@pytest.mark.django_db()
+class TestGoalCategoryListView(BaseTestCase):
+    """Тест просмотра списка категорий"""
+
+    url = reverse('goals:list-categories')
+
+    def test_auth_required(self, client):
+        """Проверка авторизации"""
+
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_cached_response_reset_on_author_change(self, auth_client, user, board_factory, goal_category_factory,
+                                                    django_capture_on_commit_callbacks):
+        """Проверка, что изменение профиля автора сразу видно в закэшированном списке категорий"""
+
+        goal_category_factory.create(board=board_factory.create(with_owner=user), user=user)
+        assert auth_client.get(self.url).json()[0]['user']['first_name'] == user.first_name
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_client.patch(reverse('core:profile'), {'first_name': 'renamed'})
+        assert response.status_code == status.HTTP_200_OK
+        assert auth_client.get(self.url).json()[0]['user']['first_name'] == 'renamed'
@@ -0,0 +1,62 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from bot.models import TgUser
+from goals.jobs import notify_goal_comments
+from goals.models import BoardParticipant
+
+
+@pytest.mark.django_db()
+class TestGoalCommentNotifications:
+    """Тест уведомлений участников доски о комментариях"""
+
+    url = reverse('goals:create-comment')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, goal_factory, user, user_factory):  # noqa: PT004
+        self.user = user
+        board = board_factory.create(with_owner=user)
+        self.goal = goal_factory.create(category=goal_category_factory.create(board=board, user=user), title='Goal')
+        self.writer = user_factory.create(username='writer')
+        board.participants.create(user=self.writer, role=BoardParticipant.Role.writer)
+        board.participants.create(user=user_factory.create(), role=BoardParticipant.Role.reader)
+        TgUser.objects.create(tg_id='1', username='owner', user=user)
+        TgUser.objects.create(tg_id='2', username='writer', user=self.writer)
+
+    def create_comment(self, client, django_capture_on_commit_callbacks, text: str):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(self.url, data={'goal': self.goal.id, 'text': text})
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    def test_comment_burst_collapsed(self, client, django_capture_on_commit_callbacks, job_queue):
+        client.force_login(self.writer)
+        first = self.create_comment(client, django_capture_on_commit_callbacks, 'first')
+        self.create_comment(client, django_capture_on_commit_callbacks, 'second')
+
+        assert not job_queue.queue
+        assert [payload['args'] for _, payload in job_queue.delayed] == [[self.goal.id, first['id']]]
+
+    def test_participants_notified_except_author(self, client, django_capture_on_commit_callbacks, job_queue,
+                                                 django_assert_num_queries):
+        client.force_login(self.writer)
+        first = self.create_comment(client, django_capture_on_commit_callbacks, 'first')
+        self.create_comment(client, django_capture_on_commit_callbacks, 'second')
+
+        with django_capture_on_commit_callbacks(execute=True), django_assert_num_queries(2):
+            notify_goal_comments(self.goal.id, first['id'])
+
+        assert [payload['kwargs'] for payload in job_queue.queue] == [{
+            'chat_id': '1',
+            'text': f'Новые комментарии к цели #{self.goal.id} Goal:\nwriter: first\nwriter: second',
+        }]
+
+    def test_notified_comments_not_repeated(self, client, django_capture_on_commit_callbacks, job_queue):
+        client.force_login(self.writer)
+        first = self.create_comment(client, django_capture_on_commit_callbacks, 'first')
+        with django_capture_on_commit_callbacks(execute=True):
+            notify_goal_comments(self.goal.id, first['id'])
+            notify_goal_comments(self.goal.id, first['id'])
+
+        assert len(job_queue.queue) == 1
@@ -0,0 +1,153 @@
+import base64
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from tests.utils import BaseTestCase
+
+
+@pytest.mark.django_db()
+class TestGoalListView(BaseTestCase):
+    """Тест просмотра списка целей"""
+
+    url = reverse('goals:list-goals')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, user):  # noqa: PT004
+        self.board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=self.board, user=user)
+
+    def test_auth_required(self, client):
+        """Проверка авторизации"""
+
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_not_modified(self, auth_client, goal_factory, user, django_capture_on_commit_callbacks,
+                          django_assert_num_queries):
+        """Проверка условного GET: 304 без изменений и без чтения целей, новый ETag после изменения цели"""
+
+        goal = goal_factory.create(category=self.category, user=user)
+        etag = auth_client.get(self.url, {'search': goal.title})['ETag']
+
+        # Сессия и пользователь, ETag берется из версий досок в кэше
+        with django_assert_num_queries(2):
+            response = auth_client.get(self.url, {'search': goal.title}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.content
+
+        etag = auth_client.get(self.url)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            goal.title = 'changed'
+            goal.save()
+        response = auth_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+        response = auth_client.get(self.url, {'ordering': 'created'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_moved_goal_listed_by_new_board(self, auth_client, board_factory, goal_category_factory,
+                                            goal_comment_factory, goal_factory, user):
+        """Проверка, что цель, перенесенная в категорию чужой доски, пропадает из списка вместе с комментариями"""
+
+        goal = goal_factory.create(category=self.category, user=user)
+        comment = goal_comment_factory.create(goal=goal, user=user)
+        other_category = goal_category_factory.create(board=board_factory.create(), user=user)
+
+        response = auth_client.patch(
+            reverse('goals:retrieve-update-destroy-goal', args=[goal.id]), {'category': other_category.id}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        assert auth_client.get(self.url).json() == []
+        comment.refresh_from_db(fields=('board',))
+        assert comment.board_id == other_category.board_id
+
+    def test_cursor_pagination(self, auth_client, goal_factory, user):
+        """Проверка keyset пагинации: страницы не пересекаются и идут по порядку"""
+
+        for title in ['g3', 'g1', 'g2', 'g1', 'g5', 'g4']:
+            goal_factory.create(title=title, category=self.category, user=user)
+
+        response = auth_client.get(self.url, {'cursor': '', 'limit': 4})
+        assert response.status_code == status.HTTP_200_OK
+        first_page = response.json()
+        assert 'count' not in first_page
+        assert first_page['previous'] is None
+        assert [goal['title'] for goal in first_page['results']] == ['g1', 'g1', 'g2', 'g3']
+
+        second_page = auth_client.get(first_page['next']).json()
+        assert [goal['title'] for goal in second_page['results']] == ['g4', 'g5']
+        assert second_page['next'] is None
+
+        previous_page = auth_client.get(second_page['previous']).json()
+        assert previous_page['results'] == first_page['results']
+
+    def test_cursor_pagination_with_ordering(self, auth_client, goal_factory, user):
+        """Проверка keyset пагинации по убыванию даты создания"""
+
+        goals = goal_factory.create_batch(size=5, category=self.category, user=user)
+        expected_ids = [goal.id for goal in sorted(goals, key=lambda goal: (goal.created, goal.id), reverse=True)]
+
+        ids, url, params = [], self.url, {'cursor': '', 'limit': 2, 'ordering': '-created'}
+        while url:
+            page = auth_client.get(url, params).json()
+            ids += [goal['id'] for goal in page['results']]
+            url, params = page['next'], None
+
+        assert ids == expected_ids
+
+    def test_goals_of_deleted_category_hidden(self, auth_client, goal_factory, user):
+        """Проверка, что цели категории, удаленной через PATCH is_deleted, не попадают в список"""
+
+        goal_factory.create(category=self.category, user=user)
+        response = auth_client.patch(
+            reverse('goals:retrieve-update-destroy-category', args=[self.category.id]), {'is_deleted': True}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        assert auth_client.get(self.url).json() == []
+
+    def test_invalid_cursor(self, auth_client):
+        """Проверка некорректного курсора"""
+
+        response = auth_client.get(self.url, {'cursor': 'invalid'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(('ordering', 'cursor'), [
+        ('title', {'v': {'a': 1}, 'id': 1, 'r': False}),
+        ('title', {'v': 'a', 'id': [1], 'r': False}),
+        ('title', {'v': 'a', 'id': 1, 'r': 'yes'}),
+        ('created', {'v': 'not a date', 'id': 1, 'r': False}),
+        ('created', {'v': None, 'id': 1, 'r': False}),
+    ])
+    def test_malformed_cursor_values(self, auth_client, ordering, cursor):
+        """Проверка, что значения курсора не того типа дают 404, а не ошибку запроса к БД"""
+
+        token = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+        response = auth_client.get(self.url, {'cursor': token, 'ordering': ordering})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_limit_offset_pagination_by_default(self, auth_client, goal_factory, user):
+        """Проверка, что без курсора используется limit/offset пагинация"""
+
+        goal_factory.create_batch(size=3, category=self.category, user=user)
+
+        response = auth_client.get(self.url, {'limit': 2})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['count'] == 3
+        assert len(response.json()['results']) == 2
+
+    def test_search(self, auth_client, goal_factory, user):
+        """Проверка поиска по названию и описанию"""
+
+        found = goal_factory.create(title='Купить молоко', category=self.category, user=user)
+        by_description = goal_factory.create(title='Магазин', description='молоко и хлеб', category=self.category, user=user)
+        goal_factory.create(title='Позвонить', category=self.category, user=user)
+
+        response = auth_client.get(self.url, {'search': 'молоко'})
+        assert response.status_code == status.HTTP_200_OK
+        assert {goal['id'] for goal in response.json()} == {found.id, by_description.id}
@@ -0,0 +1,131 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from goals.models import BoardParticipant, Goal, Tombstone
+from goals.views import SyncView
+
+
+@pytest.mark.django_db()
+class TestSyncView:
+    """Тест синхронизации изменений"""
+
+    url = reverse('goals:sync')
+
+    @pytest.fixture(autouse=True)
+    def setup(self, board_factory, goal_category_factory, user, monkeypatch):  # noqa: PT004
+        # В тестах изменения видны синхронизации сразу
+        monkeypatch.setattr(SyncView, 'settle_seconds', 0)
+        self.board = board_factory.create(with_owner=user)
+        self.category = goal_category_factory.create(board=self.board, user=user)
+
+    def test_auth_required(self, client):
+        """Проверка авторизации"""
+
+        response = client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_invalid_cursor(self, auth_client):
+        response = auth_client.get(self.url, {'since': 'bad'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_only_changes_after_cursor(self, auth_client, goal_factory, board_factory, user):
+        """Проверка, что после курсора отдаются только измененные объекты, чужие доски не отдаются"""
+
+        goal, changed_goal = goal_factory.create_batch(size=2, category=self.category, user=user)
+        goal_factory.create(category__board=board_factory.create())
+        response = auth_client.get(self.url).json()
+        assert [board['id'] for board in response['boards']] == [self.board.id]
+        assert {item['id'] for item in response['goals']} == {goal.id, changed_goal.id}
+
+        changed_goal.title = 'changed'
+        changed_goal.save()
+        response = auth_client.get(self.url, {'since': response['cursor']}).json()
+
+        assert response['boards'] == response['categories'] == response['participants'] == []
+        assert [item['title'] for item in response['goals']] == ['changed']
+        assert response['has_more'] is False
+
+        response = auth_client.get(self.url, {'since': response['cursor']}).json()
+        assert response['goals'] == []
+
+    def test_pages_do_not_overlap(self, auth_client, goal_factory, user):
+        """Проверка, что страницы по limit идут подряд и не теряют объекты разных типов"""
+
+        goals = goal_factory.create_batch(size=5, category=self.category, user=user)
+        seen, cursor = [], None
+        while True:
+            response = auth_client.get(self.url, {'limit': 2, **({'since': cursor} if cursor else {})}).json()
+            seen += [('boards', item['id']) for item in response['boards']]
+            seen += [('categories', item['id']) for item in response['categories']]
+            seen += [('goals', item['id']) for item in response['goals']]
+            cursor = response['cursor']
+            if not response['has_more']:
+                break
+
+        assert len(seen) == len(set(seen))
+        assert {item_id for kind, item_id in seen if kind == 'goals'} == {goal.id for goal in goals}
+
+    def test_deleted_objects(self, auth_client, goal_factory, goal_comment_factory, user):
+        """Проверка, что удаленный комментарий и удаленная доска с категориями и целями приходят в 'deleted'"""
+
+        goal = goal_factory.create(category=self.category, user=user)
+        comment = goal_comment_factory.create(goal=goal, user=user)
+        cursor = auth_client.get(self.url).json()['cursor']
+
+        auth_client.delete(reverse('goals:retrieve-update-destroy-comment', args=[comment.id]))
+        auth_client.delete(reverse('goals:board', args=[self.board.id]))
+        response = auth_client.get(self.url, {'since': cursor}).json()
+
+        assert response['deleted'] == {
+            'boards': [self.board.id],
+            'participants': [],
+            'categories': [self.category.id],
+            'goals': [goal.id],
+            'comments': [comment.id],
+        }
+        assert response['boards'] == response['categories'] == response['goals'] == []
+        assert Goal.objects.get(id=goal.id).status == Goal.Status.archived
+
+    def test_joined_and_removed_boards(self, auth_client, client, board_factory, goal_factory, user_factory, user):
+        """Проверка, что добавленный участник получает доску для загрузки, а удаленный - запись об удалении"""
+
+        owner = user_factory.create()
+        board = board_factory.create(with_owner=owner)
+        goal = goal_factory.create(category__board=board)
+        cursor = auth_client.get(self.url).json()['cursor']
+
+        participant = BoardParticipant.objects.create(board=board, user=user, role=BoardParticipant.Role.reader)
+        response = auth_client.get(self.url, {'since': cursor}).json()
+        assert response['joined_boards'] == [board.id]
+        assert [item['id'] for item in auth_client.get(self.url, {'board': board.id}).json()['goals']] == [goal.id]
+
+        client.force_login(owner)
+        client.put(reverse('goals:board', args=[board.id]), {'title': board.title, 'participants': []}, format='json')
+        response = auth_client.get(self.url, {'since': response['cursor']}).json()
+        assert response['deleted']['participants'] == [participant.id]
+
+    def test_cursor_older_than_tombstones(self, auth_client):
+        """Проверка, что на курсор старше срока хранения записей об удалениях отдается 410"""
+
+        old = timezone.now() - datetime.timedelta(days=SyncView.tombstone_days + 1)
+        response = auth_client.get(self.url, {'since': SyncView.encode_cursor(old, 0, 0)})
+        assert response.status_code == status.HTTP_410_GONE
+        assert response.json() == {'detail': 'Cursor is too old, full resync required'}
+
+    def test_prune_tombstones(self):
+        """Проверка, что команда prune_tombstones удаляет только записи старше срока хранения"""
+
+        old, fresh = (
+            Tombstone.objects.create(kind=Tombstone.Kind.goals, object_id=goal_id, board=self.board) for goal_id in (1, 2)
+        )
+        Tombstone.objects.filter(id=old.id).update(
+            updated=timezone.now() - datetime.timedelta(days=SyncView.tombstone_days + 1)
+        )
+
+        call_command('prune_tombstones', '--batch-size', 1)
+        assert list(Tombstone.objects.values_list('id', flat=True)) == [fresh.id]
@@ -160,6 +160,14 @@ SOCIAL_AUTH_VK_EXTRA_DATA = [
 SOCIAL_AUTH_NEW_USER_REDIRECT_URL = '/logged-in/'
 SOCIAL_AUTH_USER_MODEL = 'core.User'
 
+# CACHES
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django_redis.cache.RedisCache'),
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+    }
+}
+
 # REST_FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
@@ -202,3 +210,23 @@ LOGGING = {
 # TG_TOKEN
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
+# BOT_API_URL: адрес Bot API, для локальных замеров - адрес fake-сервера из команды benchbot
+BOT_API_URL = os.environ.get('BOT_API_URL', 'https://api.telegram.org')
+
+# BOT_STATE_STORE: где бот хранит диалоги и offset, 'redis' или 'memory' (для запуска без Redis)
+BOT_STATE_STORE = os.environ.get('BOT_STATE_STORE', 'redis')
+# BOT_UPDATE_QUEUE: очередь обновлений от webhook, 'redis' или 'memory'
+BOT_UPDATE_QUEUE = os.environ.get('BOT_UPDATE_QUEUE', 'redis')
+# BOT_UPDATE_SHARDS: число шардов очереди обновлений, каждый читает свой runbot --from-queue --shard N
+BOT_UPDATE_SHARDS = int(os.environ.get('BOT_UPDATE_SHARDS', 1))
+BOT_WEBHOOK_SECRET = os.environ.get('BOT_WEBHOOK_SECRET')
+
+# JOB_QUEUE: очередь фоновых задач (core.jobs), 'redis' или 'memory' (для тестов)
+JOB_QUEUE = os.environ.get('JOB_QUEUE', 'redis')
+# QUEUE_REDIS_URL: Redis очередей задач и обновлений и состояния бота (core.connections), отдельный от кэша
+QUEUE_REDIS_URL = os.environ.get('QUEUE_REDIS_URL', os.environ.get('BOT_REDIS_URL', 'redis://redis:6379/0'))
+
+# GOALS_SYNC_SETTLE_SECONDS: запас на расхождение часов приложения и БД для курсора синхронизации (goals.views.sync)
+GOALS_SYNC_SETTLE_SECONDS = int(os.environ.get('GOALS_SYNC_SETTLE_SECONDS', 5))
+# GOALS_SYNC_TOMBSTONE_DAYS: сколько дней хранятся записи об удалениях, курсоры старше требуют полной синхронизации
+GOALS_SYNC_TOMBSTONE_DAYS = int(os.environ.get('GOALS_SYNC_TOMBSTONE_DAYS', 30))
@@ -0,0 +1,9 @@
+# Настройки для тестов: логи пишутся только в консоль, debug.log в рабочем дереве не создается
+from todolist.settings import *  # noqa: F401,F403
+from todolist.settings import LOGGING
+
+LOGGING = {
+    **LOGGING,
+    'handlers': {'console': LOGGING['handlers']['console']},
+    'loggers': {'': {'level': 'INFO', 'handlers': ['console']}},
+}